@@ -0,0 +1,84 @@
+"""Synthetic resources for benchmarks
+
+    python benchmarks/generate.py MODE LINES PATH [--seed N]
+
+MODE is dict, test or gallows, the same seed gives the same file.
+"""
+import argparse
+import random
+import sys
+
+
+LATIN = 'abcdefghijklmnopqrstuvwxyz'
+CYRILLIC = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def word(rng, alphabet, min_length=3, max_length=12):
+    return ''.join(
+        rng.choice(alphabet)
+        for _ in range(rng.randint(min_length, max_length))
+    )
+
+
+def words(rng, alphabet, max_count):
+    return ', '.join(
+        word(rng, alphabet) for _ in range(rng.randint(1, max_count))
+    )
+
+
+def dict_lines(count, rng):
+    """ 'q1, q2 | comment = a1, a2' """
+    for _ in range(count):
+        comment = ' | ' + word(rng, LATIN) if rng.random() < 0.2 else ''
+        yield '{}{} = {}\n'.format(
+            words(rng, LATIN, 2), comment, words(rng, CYRILLIC, 3)
+        )
+
+
+def test_lines(count, rng):
+    """ 'question = ca1 | ca2 ? ia1 | ia2', half without incorrect ones """
+    for _ in range(count):
+        question = ' '.join(word(rng, CYRILLIC) for _ in range(5)) + '?'
+        correct = ' | '.join(
+            word(rng, CYRILLIC) for _ in range(rng.randint(1, 3))
+        )
+        incorrect = ''
+        if rng.random() < 0.5:
+            incorrect = ' ? ' + ' | '.join(
+                word(rng, CYRILLIC) for _ in range(rng.randint(2, 5))
+            )
+        yield '{} = {}{}\n'.format(question, correct, incorrect)
+
+
+def gallows_lines(count, rng):
+    for _ in range(count):
+        yield word(rng, CYRILLIC, 4, 14) + '\n'
+
+
+GENERATORS = {
+    'dict': dict_lines,
+    'test': test_lines,
+    'gallows': gallows_lines,
+}
+
+
+def generate(mode, count, path, seed=0):
+    """ writes count lines of the resource of mode to path """
+    rng = random.Random(seed)
+    with open(path, 'wt', encoding='utf8') as file:
+        file.writelines(GENERATORS[mode](count, rng))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('mode', choices=sorted(GENERATORS))
+    parser.add_argument('lines', type=int)
+    parser.add_argument('path')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    generate(args.mode, args.lines, args.path, args.seed)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
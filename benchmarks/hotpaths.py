@@ -0,0 +1,281 @@
+"""Benchmarks of the hot paths of modes and the view
+
+Resources are generated (generate.py) for every size of --sizes:
+- <mode>_parse_cold : Session constructor, text -> compiled table
+                      and indexes (the sidecars are removed)
+- <mode>_parse_warm : Session constructor with the sidecars
+- <mode>_launch     : launch() of a parsed resource (sampling)
+- dict_session      : launch, 100 wrong answers and the results text
+- test_session      : launch, answers (distractors are filled for
+                      every question) and the results text
+- view_display      : View.display setter under a real Tk, a growing
+                      and a replaced text, like frames of sessions
+                      (skipped if there is no display, use xvfb-run)
+
+Medians are compared with the baseline (baseline.json), a result
+slower than the baseline by more than --tolerance is a regression,
+the exit code is 1 if there are any (slowdowns less than
+--min-delta-ms are ignored as noise). The baseline depends on the
+machine, update it with --save-baseline.
+
+Usage:
+    python benchmarks/hotpaths.py [--sizes 1000 10000] [--repeat N]
+        [--json] [--output FILE] [--save-baseline]
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from generate import generate
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+BASELINE_PATH = os.path.join(HERE, 'baseline.json')
+MODES = {
+    'dict': 'gallows.modes.dictmode:DictMode',
+    'test': 'gallows.modes.testmode:TestMode',
+    'gallows': 'gallows.modes.gallowsmode:GallowsMode',
+}
+SESSION_SETTINGS = {
+    'dict': {'count': 100, 'reverse': False, 'tolerance': 0},
+    'test': {'count': 6},
+    'gallows': {'count': 20},
+}
+
+
+def measure(run, setup=None, repeat=5):
+    """ returns times (ms) of run(), setup() isn't timed """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def summary(times):
+    return {
+        'median_ms': statistics.median(times),
+        'min_ms': min(times),
+        'runs': len(times),
+    }
+
+
+class ModeBench:
+    """ benchmarks of one mode with a generated resource """
+
+    def __init__(self, key, mode_cls, path, repeat):
+        from gallows.cache import resource_cache
+
+        self.key = key
+        self.mode_cls = mode_cls
+        self.path = path
+        self.name = os.path.basename(path)
+        self.repeat = repeat
+        self.settings = SESSION_SETTINGS[key]
+        self._cache = resource_cache
+        # the compiled table and the indexes (.name.ggc, .name.*.ggc)
+        self._sidecars = os.path.join(
+            os.path.dirname(path), '.{}*.ggc'.format(self.name)
+        )
+
+    def session(self):
+        from gallows.session import Session
+
+        return Session(
+            self.mode_cls, self.name, dict(self.settings),
+            event_log=None, history=False
+        )
+
+    def cold(self):
+        for sidecar in glob.glob(self._sidecars):
+            os.remove(sidecar)
+        self._cache.invalidate()
+
+    def run(self):
+        results = {}
+        results['parse_cold'] = measure(
+            self.session, self.cold, self.repeat
+        )
+        results['parse_warm'] = measure(
+            self.session, self._cache.invalidate, self.repeat
+        )
+        sessions = []
+        results['launch'] = measure(
+            lambda: sessions[-1].start(),
+            lambda: sessions.append(self.session()),
+            self.repeat
+        )
+        if self.key in ('dict', 'test'):
+            results['session'] = measure(
+                lambda: self.play(sessions[-1]),
+                lambda: sessions.append(self.session()),
+                self.repeat
+            )
+        return results
+
+    def play(self, session):
+        # wrong answers, every one is in the results text
+        frame = session.start()
+        answer = 'x' if self.key == 'dict' else '1'
+        while not frame.finished:
+            frame = session.answer(answer)
+
+
+def bench_view(repeat):
+    """ View.display under Tk, None if there is no display """
+    import tkinter as tk
+    from gallows.view import View
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    view = View(root)
+    lines = ['{} строка текста результата'.format(i) for i in range(200)]
+
+    def run():
+        text = ''
+        for line in lines:
+            text += line + '\n'
+            view.display = text
+            root.update_idletasks()
+        for line in lines:
+            view.display = line
+            root.update_idletasks()
+
+    try:
+        return {'display': measure(run, repeat=repeat)}
+    finally:
+        root.destroy()
+
+
+def run_benchmarks(sizes, repeat, workdir):
+    import importlib
+
+    results = {}
+    for key, target in MODES.items():
+        module_name, _, class_name = target.partition(':')
+        mode_cls = getattr(importlib.import_module(module_name), class_name)
+        for size in sizes:
+            directory = os.path.join(workdir, '{}-{}'.format(key, size))
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, 'resource')
+            generate(key, size, path)
+            mode_cls.path = directory
+            for case, times in ModeBench(
+                key, mode_cls, path, repeat
+            ).run().items():
+                results['{}_{}/{}'.format(key, case, size)] = summary(times)
+            os.remove(path)
+
+    view = bench_view(repeat)
+    if view is not None:
+        for case, times in view.items():
+            results['view_{}'.format(case)] = summary(times)
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """ returns {name: ratio} of regressions """
+    regressions = {}
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        # short cases are noisy, small absolute differences are ignored
+        if result['median_ms'] - base['median_ms'] < min_delta_ms:
+            continue
+        ratio = result['median_ms'] / max(base['median_ms'], 1e-6)
+        if ratio > 1 + tolerance:
+            regressions[name] = ratio
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '--sizes',
+        type=int,
+        nargs='+',
+        default=[1000, 10000, 100000],
+        help='lines of the generated resources (up to 10000000)'
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.25,
+        help='allowed slowdown against the baseline (0.25 = 25%%)'
+    )
+    parser.add_argument(
+        '--min-delta-ms',
+        type=float,
+        default=1.0,
+        help='smaller slowdowns are not regressions'
+    )
+    parser.add_argument('--json', action='store_true', help='JSON output')
+    parser.add_argument('--output', help='write JSON results to the file')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    with tempfile.TemporaryDirectory() as workdir:
+        # the benchmark sessions write nothing, this is a safeguard
+        os.environ['GALLOWS_HOME'] = workdir
+        results = run_benchmarks(args.sizes, args.repeat, workdir)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f_handle:
+            baseline = json.load(f_handle)['results']
+    regressions = compare(
+        results, baseline, args.tolerance, args.min_delta_ms
+    )
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+        'regressions': regressions,
+    }
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f_handle:
+            # regressions against the previous baseline are not saved
+            baseline_report = {
+                key: report[key] for key in ('python', 'platform', 'results')
+            }
+            json.dump(baseline_report, f_handle, indent=2, sort_keys=True)
+            f_handle.write('\n')
+        regressions = {}
+    if args.output:
+        with open(args.output, 'w') as f_handle:
+            json.dump(report, f_handle, indent=2, sort_keys=True)
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    else:
+        for name, result in sorted(results.items()):
+            base = baseline.get(name)
+            print('{:<28} {:10.2f} ms{}{}'.format(
+                name,
+                result['median_ms'],
+                '  (baseline {:.2f} ms)'.format(base['median_ms'])
+                    if base else '',
+                '  REGRESSION x{:.2f}'.format(regressions[name])
+                    if name in regressions else '',
+            ))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
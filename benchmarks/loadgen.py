@@ -0,0 +1,239 @@
+"""Load generator of sessions without the GUI
+
+Sessions of DictMode, TestMode and GallowsMode are synthesized (or
+replayed from recordings) in one process, every session has its own
+seed, so a run is reproducible. Answers are synthesized from the
+frames: a DictMode answer is right with --accuracy probability,
+TestMode answers are random options, GallowsMode opens random letters
+and names the word with --accuracy probability.
+
+Reported: sessions per second and percentiles of the time of one
+answer (Session.answer, the mode and the frame), the histories and
+the event logs of sessions are disabled.
+
+Recordings refer to resources by name, record sessions of the
+built-in resources (without --lines) to replay them later.
+
+Usage:
+    python benchmarks/loadgen.py [--modes dict test gallows]
+        [--sessions 1000] [--seed 0] [--lines N] [--record FILE]
+    python benchmarks/loadgen.py --replay FILE
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from generate import generate
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+MODES = {
+    'dict': 'gallows.modes.dictmode:DictMode',
+    'test': 'gallows.modes.testmode:TestMode',
+    'gallows': 'gallows.modes.gallowsmode:GallowsMode',
+}
+MAX_ANSWERS = 1000  # of a session, protects from a mode which never ends
+
+
+def dict_answer(session, frame, rng, accuracy):
+    if rng.random() < accuracy:
+        return rng.choice(session.task.answer)
+    return 'нет'
+
+
+def test_answer(session, frame, rng, accuracy):
+    options = len(frame.state['options'])
+    chosen = rng.sample(range(1, options + 1), rng.randint(1, options))
+    return ' '.join(map(str, chosen))
+
+
+def gallows_answer(session, frame, rng, accuracy):
+    state = frame.state
+    if state['countdown']:
+        closed = [
+            letter for letter in session.mode.ALPHABET
+            if letter not in state['letters']
+        ]
+        return rng.choice(closed)
+    if rng.random() < accuracy:
+        return session.task._word
+    return 'НЕТ'
+
+
+ANSWERS = {
+    'dict': dict_answer,
+    'test': test_answer,
+    'gallows': gallows_answer,
+}
+
+
+class LoadStats:
+    """ sessions, answers and the histogram of answer times """
+
+    def __init__(self):
+        from gallows.metrics import Histogram
+
+        self.sessions = 0
+        self.answers = Histogram()
+        self.seconds = 0.0
+
+    def report(self):
+        answers = self.answers.summary()
+        return {
+            'sessions': self.sessions,
+            'seconds': self.seconds,
+            'sessions_per_second':
+                self.sessions / self.seconds if self.seconds else 0.0,
+            'answers': answers['count'],
+            'answer_p50_ms': answers['p50_ms'],
+            'answer_p95_ms': answers['p95_ms'],
+            'answer_p99_ms': answers['p99_ms'],
+            'answer_max_ms': answers['max_ms'],
+        }
+
+
+def run_session(session, next_answer, stats):
+    frame = session.start()
+    while not frame.finished and len(session.answers) < MAX_ANSWERS:
+        answer_text = next_answer(frame)
+        start = time.perf_counter()
+        frame = session.answer(answer_text)
+        stats.answers.add(time.perf_counter() - start)
+    stats.sessions += 1
+
+
+def synthesize(key, mode_cls, resource_name, count, seed, accuracy,
+               record=None):
+    from gallows.session import Session
+
+    stats = LoadStats()
+    rng = random.Random(seed)
+    answer = ANSWERS[key]
+    start = time.perf_counter()
+    for _ in range(count):
+        session = Session(
+            mode_cls,
+            resource_name,
+            event_log=None,
+            seed=rng.getrandbits(64),
+            history=False
+        )
+        run_session(
+            session,
+            lambda frame: answer(session, frame, rng, accuracy),
+            stats
+        )
+        if record is not None:
+            record.write(json.dumps(session.recording(), ensure_ascii=False))
+            record.write('\n')
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def replay_all(path):
+    from gallows.replay import matches, read_recordings, replay
+
+    stats = LoadStats()
+    mismatched = unchecked = 0
+    start = time.perf_counter()
+    for recording in read_recordings(path):
+        stamps = []
+        session = replay(
+            recording,
+            on_frame=lambda frame: stamps.append(time.perf_counter())
+        )
+        # the first frame is the launch, then a frame per answer
+        for previous, current in zip(stamps, stamps[1:]):
+            stats.answers.add(current - previous)
+        stats.sessions += 1
+        matched = matches(recording, session)
+        if matched is None:
+            unchecked += 1
+        elif not matched:
+            mismatched += 1
+    stats.seconds = time.perf_counter() - start
+    report = stats.report()
+    report['mismatched'] = mismatched
+    report['unchecked'] = unchecked
+    return report
+
+
+def run_modes(args, workdir, record):
+    import importlib
+
+    results = {}
+    for key in args.modes:
+        module_name, _, class_name = MODES[key].partition(':')
+        mode_cls = getattr(importlib.import_module(module_name), class_name)
+        if args.lines:
+            directory = os.path.join(workdir, key)
+            os.makedirs(directory, exist_ok=True)
+            generate(key, args.lines, os.path.join(directory, 'resource'))
+            mode_cls.path = directory
+        resource_name = mode_cls.get_resources_names()[0]
+        results[key] = synthesize(
+            key, mode_cls, resource_name, args.sessions, args.seed,
+            args.accuracy, record
+        ).report()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '--modes', nargs='+', choices=list(MODES), default=list(MODES)
+    )
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--accuracy', type=float, default=0.5)
+    parser.add_argument(
+        '--lines',
+        type=int,
+        help='generated resources of LINES lines (default: the built-in)'
+    )
+    parser.add_argument(
+        '--record', help='write recordings of the sessions to the file'
+    )
+    parser.add_argument('--replay', help='replay recordings of the file')
+    parser.add_argument('--json', action='store_true', help='JSON output')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        # histories and event logs are not written anyway
+        os.environ['GALLOWS_HOME'] = workdir
+        if args.replay:
+            results['replay'] = replay_all(args.replay)
+        else:
+            record = None
+            if args.record:
+                record = open(args.record, 'wt', encoding='utf8')
+            try:
+                results = run_modes(args, workdir, record)
+            finally:
+                if record is not None:
+                    record.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    else:
+        for name, report in results.items():
+            print(
+                '{}: {sessions} sessions, {sessions_per_second:.1f} '
+                'sessions/s, {answers} answers, p50 {answer_p50_ms:.3f} ms, '
+                'p95 {answer_p95_ms:.3f} ms, p99 {answer_p99_ms:.3f} ms'
+                .format(name, **report)
+            )
+    if any(report.get('mismatched') for report in results.values()):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
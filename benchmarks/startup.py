@@ -0,0 +1,127 @@
+"""Startup time benchmark of the GUI
+
+Every run uses a fresh interpreter:
+- import  : cumulative import time of gallows.__main__ and gallows.gg
+            (parsed from 'python -X importtime')
+- startup : time from the start of 'python -m gallows' main() to the
+            first call of Tk mainloop, tkinter is replaced by headless
+            stubs, so no display is needed
+
+The medians are compared with the budget (startup_budget.json),
+the exit code is 1 if any of them is over budget.
+
+Usage:
+    python benchmarks/startup.py [--runs N] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+BUDGET_PATH = os.path.join(HERE, 'startup_budget.json')
+
+STARTUP_SCRIPT = r'''
+import sys
+import time
+import types
+from unittest import mock
+
+# headless stubs of tkinter: widgets are mocks, View needs a real base
+class Frame:
+    def __init__(self, master=None, **options):
+        self.master = master
+
+tkinter = mock.MagicMock(name='tkinter')
+ttk = mock.MagicMock(name='tkinter.ttk')
+ttk.Frame = Frame
+tkinter.ttk = ttk
+sys.modules['tkinter'] = tkinter
+sys.modules['tkinter.ttk'] = ttk
+
+start = time.perf_counter()
+from gallows.__main__ import main
+main([])  # returns after the (stub) mainloop call
+print(time.perf_counter() - start)
+'''
+
+
+def run_python(args):
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE='')
+    return subprocess.run(
+        [sys.executable] + args,
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+
+def measure_import():
+    """ returns the cumulative import time of gallows modules (ms) """
+    result = run_python(
+        ['-X', 'importtime', '-c', 'import gallows.__main__, gallows.gg']
+    )
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        # nested imports are indented, count top-level ones only
+        if name.startswith(' gallows'):
+            total += int(cumulative)
+    return total / 1000
+
+
+def measure_startup():
+    """ returns the time to the first mainloop call (ms) """
+    result = run_python(['-c', STARTUP_SCRIPT])
+    return float(result.stdout.strip().splitlines()[-1]) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--json', action='store_true', help='JSON output')
+    args = parser.parse_args()
+
+    with open(BUDGET_PATH) as f_handle:
+        budget = json.load(f_handle)
+
+    # the first run warms up the bytecode cache and the disk cache
+    measure_import()
+    results = {
+        'import_ms': statistics.median(
+            measure_import() for _ in range(args.runs)
+        ),
+        'startup_ms': statistics.median(
+            measure_startup() for _ in range(args.runs)
+        ),
+    }
+    over = {
+        key: value for key, value in results.items()
+            if value > budget[key]
+    }
+
+    if args.json:
+        print(json.dumps({
+            'results': results, 
+            'budget': budget, 
+            'over_budget': sorted(over),
+        }, indent=2))
+    else:
+        for key, value in results.items():
+            print('{:<12} {:8.1f} ms  (budget {:.1f} ms){}'.format(
+                key, value, budget[key], '  OVER BUDGET' if key in over else ''
+            ))
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
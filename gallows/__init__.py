@@ -1 +1,13 @@
+from .modes import Mode, modes
+from .registry import ModeSpec, get_mode, get_specs
+from .session import Frame, Session
 
+
+def __getattr__(name):
+    # tkinter is imported only if the GUI is used
+    if name == 'GallowsGame':
+        from .gg import GallowsGame
+        return GallowsGame
+    raise AttributeError(
+        "module {!r} has no attribute {!r}".format(__name__, name)
+    )
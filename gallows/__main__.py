@@ -1,6 +1,171 @@
-from .gg import GallowsGame
-from .modes import modes
+import sys
+
+
+def compile_resources(names):
+    from .registry import get_specs
+
+    specs = get_specs()
+    if set(names) - set(specs):
+        sys.exit('Unknown mode name')
+    selected = [
+        spec.load() for name, spec in specs.items() 
+            if not names or name in names
+    ]
+    for mode in selected:
+        if not mode._read_records:
+            continue
+        for resource_name in mode.get_resources_names():
+            length = mode.compile_resource(resource_name)
+            print('{}/{}: {} records'.format(
+                mode.get_name(), resource_name, length
+            ))
+
+
+def print_worst(limit, mode=None, resource=None):
+    from . import events
+
+    events.compact()
+    rows = events.worst(limit=limit, mode=mode, resource=resource)
+    for mode_name, resource_name, key, answers, mistakes, latency in rows:
+        print('{}/{}: {} - {} of {} wrong, {:.1f} s'.format(
+            mode_name, resource_name, key, mistakes, answers, latency
+        ))
+
+
+def launch_gui():
+    from .gg import GallowsGame
+    GallowsGame().launch()
+
+
+def make_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m gallows')
+    parser.add_argument(
+        '--metrics', 
+        metavar='FILE', 
+        help='write timings of the hot paths to FILE (JSON) at the exit'
+    )
+    parser.add_argument(
+        '--profile', 
+        metavar='FILE', 
+        help='write the cProfile stats of the first session to FILE'
+    )
+    parser.add_argument(
+        '--record', 
+        metavar='FILE', 
+        help='append finished sessions to FILE (JSON lines)'
+    )
+    parser.add_argument(
+        '--report', 
+        metavar='DIR', 
+        help='write the report of every finished session to DIR'
+    )
+    parser.add_argument(
+        '--report-format', 
+        choices=('jsonl', 'csv'), 
+        default='jsonl'
+    )
+    commands = parser.add_subparsers(dest='command')
+
+    serve_parser = commands.add_parser(
+        'serve', 
+        help='run the local multi-session HTTP server'
+    )
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8080)
+
+    compile_parser = commands.add_parser(
+        'compile', 
+        help='compile text resources to the binary format'
+    )
+    compile_parser.add_argument(
+        'modes', 
+        nargs='*', 
+        help='names of modes (default: all)'
+    )
+
+    stats_parser = commands.add_parser(
+        'stats', 
+        help='show questions with the most mistakes'
+    )
+    stats_parser.add_argument('--limit', type=int, default=50)
+    stats_parser.add_argument('--mode')
+    stats_parser.add_argument('--resource')
+
+    grade_parser = commands.add_parser(
+        'grade', 
+        help='grade answers collected offline (CSV or JSONL)'
+    )
+    grade_parser.add_argument('mode', help='mode name')
+    grade_parser.add_argument('resource', help='resource name')
+    grade_parser.add_argument('submissions', help='CSV or JSONL file')
+    grade_parser.add_argument('--format', choices=('csv', 'jsonl'))
+    grade_parser.add_argument(
+        '--output', 
+        help='file of results (default: stdout)'
+    )
+    grade_parser.add_argument(
+        '--workers', 
+        type=int, 
+        help='number of processes (default: number of CPUs)'
+    )
+    grade_parser.add_argument('--chunk-size', type=int, default=1000)
+    grade_parser.add_argument(
+        '--reverse', 
+        action='store_true', 
+        help='reverse direction of dictionaries'
+    )
+
+    replay_parser = commands.add_parser(
+        'replay', 
+        help='replay recorded sessions (see --record)'
+    )
+    replay_parser.add_argument('recordings', help='JSON lines file')
+    replay_parser.add_argument(
+        '--check', 
+        action='store_true', 
+        help='only check that results are reproduced'
+    )
+    return parser
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        # the GUI doesn't need argparse (startup time)
+        launch_gui()
+        return
+
+    args = make_parser().parse_args(argv)
+    if args.metrics or args.profile:
+        from . import metrics
+        metrics.enable(args.metrics, args.profile)
+    if args.record:
+        from . import replay
+        replay.enable_recording(args.record)
+    if args.report:
+        from . import report
+        report.enable_export(args.report, args.report_format)
+
+    # import only the front end which is used (tkinter for GUI)
+    if args.command == 'compile':
+        compile_resources(args.modes)
+    elif args.command == 'grade':
+        from .grading import main as grade_main
+        grade_main(args)
+    elif args.command == 'replay':
+        from .replay import main as replay_main
+        replay_main(args)
+    elif args.command == 'stats':
+        print_worst(args.limit, args.mode, args.resource)
+    elif args.command == 'serve':
+        from .server import serve
+        serve(args.host, args.port)
+    else:
+        launch_gui()
 
 
 if __name__ == '__main__':
-    GallowsGame().launch()
\ No newline at end of file
+    main()
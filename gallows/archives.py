@@ -0,0 +1,176 @@
+"""Compressed resources
+
+A resource can be a gzip ('.gz') or xz ('.xz') file or a member of a
+zip bundle: every file of 'bundle.zip' is a resource named
+'bundle.zip/member'. Resources are read as a stream of text lines
+(only a buffer is decompressed at a time), parsers of modes open them
+with open_text() instead of open().
+
+Random access (GallowsMode) goes through the compiled table (see
+compiled.py), it is built by one streaming pass and stored
+uncompressed, so the archive is not read again until it changes.
+Sidecars of the members of a bundle are stored next to the bundle,
+they are stamped by the bundle file.
+"""
+import os
+
+
+ZIP_SUFFIX = '.zip'
+MEMBER_SEPARATOR = '/'  # between the name of the bundle and the member
+# compression ratio of text, estimates the size of the text if the
+# archive doesn't store it
+TEXT_RATIO = 3
+XZ_FOOTER_SIZE = 12  # the stream header has the same size
+
+
+def split_member(path):
+    """ returns (bundle path, member name) of a member of a zip bundle,
+    (path, None) for other files
+    """
+    marker = ZIP_SUFFIX + MEMBER_SEPARATOR
+    start = 0
+    while True:
+        i = path.lower().find(marker, start)
+        if i == -1:
+            return path, None
+        bundle = path[:i + len(ZIP_SUFFIX)]
+        if os.path.isfile(bundle):
+            return bundle, path[i + len(marker):]
+        start = i + 1
+
+
+def source_path(path):
+    """ returns the path of the file containing the resource path """
+    return split_member(path)[0]
+
+
+def open_text(path):
+    """ returns the text stream (utf-8) of the resource path """
+    bundle, member = split_member(path)
+    if member is not None:
+        import io
+        import zipfile
+
+        # the member keeps the file open after the bundle is closed
+        with zipfile.ZipFile(bundle) as archive:
+            stream = archive.open(member)
+        return io.TextIOWrapper(stream, encoding='utf8')
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.gz':
+        import gzip
+        return gzip.open(path, 'rt', encoding='utf8')
+    if extension == '.xz':
+        import lzma
+        return lzma.open(path, 'rt', encoding='utf8')
+    return open(path, 'rt', encoding='utf8')
+
+
+def text_size(path):
+    """Returns the size of the text of the resource path
+
+    Sizes of zip members and xz files are read from the archive (the
+    index of every xz stream). gzip stores the size of the last member
+    modulo 4 GiB: it is used if it is not less than the size of the
+    file (a single member), otherwise the size is estimated by
+    TEXT_RATIO, as for damaged archives.
+    """
+    bundle, member = split_member(path)
+    if member is not None:
+        import zipfile
+
+        with zipfile.ZipFile(bundle) as archive:
+            return archive.getinfo(member).file_size
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in ('.gz', '.xz'):
+        return os.path.getsize(path)
+    with open(path, 'rb') as f_handle:
+        f_handle.seek(0, os.SEEK_END)
+        file_size = f_handle.tell()
+        if extension == '.xz':
+            size = _xz_size(f_handle, file_size)
+        elif file_size >= 4:
+            f_handle.seek(-4, os.SEEK_END)
+            size = int.from_bytes(f_handle.read(4), 'little')
+            if size < file_size:
+                size = None
+        else:
+            size = None
+    return file_size * TEXT_RATIO if size is None else size
+
+
+def _xz_size(f_handle, file_size):
+    """ returns the uncompressed size of the xz file (sum of the
+    sizes in the indexes of its streams, from the end), None if
+    it is damaged
+    """
+    import struct
+
+    total = 0
+    end = file_size
+    while end > 0:
+        if end < 2 * XZ_FOOTER_SIZE:
+            return None
+        f_handle.seek(end - 4)
+        if f_handle.read(4) == bytes(4):
+            end -= 4  # stream padding
+            continue
+        f_handle.seek(end - XZ_FOOTER_SIZE)
+        footer = f_handle.read(XZ_FOOTER_SIZE)
+        if footer[-2:] != b'YZ':
+            return None
+        # backward size: size of the index
+        index_size = (struct.unpack_from('<I', footer, 4)[0] + 1) * 4
+        index_start = end - XZ_FOOTER_SIZE - index_size
+        if index_start < XZ_FOOTER_SIZE:
+            return None
+        f_handle.seek(index_start)
+        index = f_handle.read(index_size)
+        if index[:1] != b'\0':
+            return None
+        position = 1
+        try:
+            count, position = _xz_number(index, position)
+            blocks_size = 0
+            for _ in range(count):
+                unpadded, position = _xz_number(index, position)
+                uncompressed, position = _xz_number(index, position)
+                blocks_size += unpadded + (-unpadded % 4)
+                total += uncompressed
+        except IndexError:
+            return None
+        end = index_start - blocks_size - XZ_FOOTER_SIZE
+        if end < 0:
+            return None
+    return total
+
+
+def _xz_number(data, position):
+    """ returns (a variable-length integer of xz at position of
+    data, the position after it)
+    """
+    number = 0
+    for shift in range(0, 63, 7):
+        byte = data[position]
+        position += 1
+        number |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return number, position
+    raise IndexError('Invalid xz number')
+
+
+def members(bundle):
+    """ returns names of the resources of the zip bundle
+    (hidden files and directories are skipped)
+    """
+    import zipfile
+
+    try:
+        with zipfile.ZipFile(bundle) as archive:
+            infos = archive.infolist()
+    except (OSError, zipfile.BadZipFile):
+        return []
+    return [
+        info.filename for info in infos
+        if not info.is_dir()
+        and not info.filename.rsplit('/', 1)[-1].startswith('.')
+    ]
@@ -0,0 +1,123 @@
+"""Process-wide cache of parsed resources
+
+Modes share the parsed data of their resources through 'resource_cache'.
+An entry is identified by (mode class, resource path, parse settings),
+it is reparsed when the mtime or size of the resource file changes.
+Least recently used entries are evicted when the total (estimated)
+size of the cached data exceeds 'max_bytes'.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+from .compiled import source_stamp
+
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def deep_sizeof(obj):
+    """ estimate the memory used by obj and its items """
+    seen = set()
+    stack = [obj]
+    size = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return size
+
+
+class ResourceCache:
+    """LRU cache of parsed resources
+
+    - get(key, path, load) -> data
+      : returns cached data for key, calls load() if
+        there is no entry or path was modified
+    - invalidate(key=None) -> None
+      : drops one or all entries
+    - stats() -> dict
+      : hits, misses, evictions, entries, size, max_bytes
+
+    Cached data is shared, modes must not modify it.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self._entries = OrderedDict()  # key: (stamp, size, data)
+        self._lock = threading.Lock()
+        self._max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        with self._lock:
+            self._max_bytes = value
+            self._evict()
+
+    def get(self, key, path, load):
+        stamp = source_stamp(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        # parse without the lock, other resources stay available
+        data = load()
+        size = deep_sizeof(data)
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (stamp, size, data)
+            self.size += size
+            self._evict()
+        return data
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self.size = 0
+            else:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self.size -= entry[1]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'size': self.size,
+                'max_bytes': self._max_bytes,
+            }
+
+    def _evict(self):
+        # the most recent entry is kept even if it is larger than the budget
+        while self.size > self._max_bytes and len(self._entries) > 1:
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+
+
+resource_cache = ResourceCache()
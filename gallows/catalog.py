@@ -0,0 +1,146 @@
+"""Cached catalog of resources of a directory
+
+The directory is rescanned only when its mtime changes (a file was
+added, removed or renamed), entries of unchanged files are reused.
+Names are kept sorted for prefix search (search-as-you-type).
+Files of zip bundles are resources too (see archives.py).
+"""
+import bisect
+import os
+import threading
+from collections import namedtuple
+
+from . import archives
+
+
+# - name: str
+# - size: int
+# - mtime: int (ns)
+# - entries: int or None : number of records (from the compiled table)
+# - compiled: bool       : the compiled table is up to date
+ResourceInfo = namedtuple('ResourceInfo', 'name size mtime entries compiled')
+
+
+def describe(info):
+    """ returns one line description of ResourceInfo for users """
+    text = '{}: {:.1f} KB'.format(info.name, info.size / 1024)
+    if info.compiled:
+        return text + ', {} records'.format(info.entries)
+    return text + ', not compiled'
+
+
+class ResourceCatalog:
+    """Catalog of the resources of path
+
+    - names() -> List[str]        : sorted names of resources
+    - search(prefix) -> List[str] : names starting with prefix
+                                    (case insensitive)
+    - info(name) -> ResourceInfo  : file metadata
+    - name in catalog -> bool
+
+    Hidden files (sidecars of resources) are skipped, tag is the
+    records version of the mode (see compiled.load).
+    """
+
+    def __init__(self, path, tag=0):
+        self.path = path
+        self.tag = tag
+        self._lock = threading.Lock()
+        self._dir_mtime = None
+        self._files = {}    # 'name': (size, mtime)
+        self._details = {}  # 'name': ((size, mtime), ResourceInfo)
+        self._keys = []     # sorted [(casefolded name, name)]
+        self._bundles = {}  # 'bundle path': ((size, mtime), [members])
+
+    def __contains__(self, name):
+        self.refresh()
+        return name in self._files
+
+    def names(self):
+        self.refresh()
+        return [name for _, name in self._keys]
+
+    def search(self, prefix):
+        self.refresh()
+        keys = self._keys
+        prefix = prefix.casefold()
+        start = bisect.bisect_left(keys, (prefix,))
+        result = []
+        for key, name in keys[start:]:
+            if not key.startswith(prefix):
+                break
+            result.append(name)
+        return result
+
+    def info(self, name):
+        self.refresh()
+        if name not in self._files:
+            raise KeyError(name)
+        from . import compiled
+
+        # edits in place don't change the directory, stat the file
+        file_path = os.path.join(self.path, name)
+        stat = os.stat(archives.source_path(file_path))
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        cached = self._details.get(name)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        entries = compiled.records_count(file_path, self.tag)
+        info = ResourceInfo(name, *stamp, entries, entries is not None)
+        self._details[name] = (stamp, info)
+        return info
+
+    def refresh(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._dir_mtime:
+            return
+        with self._lock:
+            if mtime == self._dir_mtime:
+                return
+            files = {}
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    old = self._files.get(entry.name)
+                    # a modification of a file doesn't change the mtime
+                    # of the directory, the stat is only for new files
+                    if old is None:
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                        old = (stat.st_size, stat.st_mtime_ns)
+                    if entry.name.lower().endswith(archives.ZIP_SUFFIX):
+                        # a bundle, its files are the resources
+                        for member in self._members(entry.path, old):
+                            name = entry.name + archives.MEMBER_SEPARATOR
+                            files[name + member] = old
+                    else:
+                        files[entry.name] = old
+            self._files = files
+            self._details = {
+                name: details for name, details in self._details.items()
+                    if name in files
+            }
+            self._keys = sorted((name.casefold(), name) for name in files)
+            self._dir_mtime = mtime
+
+    def _members(self, bundle, stamp):
+        # members are read again only if the bundle is changed
+        cached = self._bundles.get(bundle)
+        if cached is None or cached[0] != stamp:
+            members = archives.members(bundle)
+            cached = self._bundles[bundle] = (stamp, members)
+        return cached[1]
+
+
+_catalogs = {}
+
+
+def get_catalog(path, tag=0):
+    """ returns the shared catalog of path """
+    catalog = _catalogs.get((path, tag))
+    if catalog is None:
+        catalog = _catalogs.setdefault((path, tag), ResourceCatalog(path, tag))
+    return catalog
@@ -0,0 +1,444 @@
+"""Compiled binary format of resources
+
+Text resources stay the source of truth, the compiled table is
+stored next to the resource in a hidden sidecar file ('.name.ggc')
+and is rebuilt automatically when the mtime or size of the resource
+changes (or the version of the parser, 'tag', changes).
+The table is memory-mapped and only the strings which are
+actually used are decoded.
+
+A resource is a sequence of records, a record is a fixed number of
+groups (fields), a group is a tuple of strings:
+    DictMode:    (questions, answers)
+    TestMode:    ((question,), correct answers, incorrect answers)
+    GallowsMode: ((word,),)
+
+File layout (all integers are array('I') items):
+    header
+    string offsets  : n_strings + 1, offsets in the string blob
+    group offsets   : n_groups + 1, offsets in the group items
+    group items     : string ids
+    records         : n_records * fields, group ids
+    string blob     : utf-8
+Equal strings and equal groups are stored once.
+
+Indexes built over a resource (see load_arrays) are stored the same
+way in '.name.kind.ggc': named arrays, rebuilt with the table (they
+keep the stamp, VERSION and tag of the table they were built from).
+"""
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+
+from . import archives
+
+
+MAGIC = b'GGCR'
+VERSION = 2
+# magic, version, fields, source mtime_ns, source size,
+# strings count, groups count, records count, tag
+HEADER = struct.Struct('=4sHHqQIIII')
+SUFFIX = '.ggc'
+INDEX_MAGIC = b'GGCI'
+INDEX_VERSION = 2
+# magic, version, source mtime_ns, source size, tag,
+# table version, table tag, arrays count
+INDEX_HEADER = struct.Struct('=4sHqQIHII')
+# typecode, name size, items count
+ARRAY_HEADER = struct.Struct('=cHQ')
+ITEMSIZE = array('I').itemsize
+# mkstemp creates private files, written files get the usual mode
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def sidecar_path(path, suffix=SUFFIX):
+    """ returns the path of the hidden sidecar file for path """
+    bundle, member = archives.split_member(path)
+    if member is not None:
+        # next to the zip bundle, '.bundle.zip!member.ggc'
+        path = '{}!{}'.format(bundle, member.replace('/', '!'))
+    head, tail = os.path.split(path)
+    return os.path.join(head, '.{}{}'.format(tail, suffix))
+
+
+def source_stamp(path):
+    """ returns (mtime_ns, size) used to detect changes of path
+    (of the zip bundle for its members, see archives.py)
+    """
+    stat = os.stat(archives.source_path(path))
+    return stat.st_mtime_ns, stat.st_size
+
+
+def build(records, stamp=(0, 0), tag=0):
+    """ returns the compiled table of records (bytes) """
+    strings = {}  # 'string': id
+    groups = {}   # (string ids): id
+    blob = bytearray()
+    string_offsets = array('I', [0])
+    group_offsets = array('I', [0])
+    group_items = array('I')
+    record_items = array('I')
+    fields = 0
+
+    for record in records:
+        if not fields:
+            fields = len(record)
+        elif len(record) != fields:
+            raise ValueError(
+                'Record {!r} must have {} fields'.format(record, fields)
+            )
+        for group in record:
+            ids = []
+            for string in group:
+                id_ = strings.get(string)
+                if id_ is None:
+                    id_ = strings[string] = len(strings)
+                    blob += string.encode('utf-8')
+                    string_offsets.append(len(blob))
+                ids.append(id_)
+            ids = tuple(ids)
+            group_id = groups.get(ids)
+            if group_id is None:
+                group_id = groups[ids] = len(groups)
+                group_items.extend(ids)
+                group_offsets.append(len(group_items))
+            record_items.append(group_id)
+
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        fields,
+        *stamp,
+        len(strings),
+        len(groups),
+        len(record_items) // fields if fields else 0,
+        tag
+    )
+    return b''.join((
+        header,
+        string_offsets.tobytes(),
+        group_offsets.tobytes(),
+        group_items.tobytes(),
+        record_items.tobytes(),
+        bytes(blob),
+    ))
+
+
+class Table:
+    """Read-only view of a compiled table
+
+    - len(table) -> int      : number of records
+    - table[i] -> tuple      : i-th record, tuple of groups
+    - group(i) -> tuple      : i-th group, tuple of strings
+    - string(i) -> str       : i-th string
+    - record_ids(i) -> tuple : i-th record, tuple of groups of
+                               string ids (nothing is decoded)
+    - strings_count: int
+    - fields: int            : number of groups in a record
+    - stamp: (mtime, size)   : stamp of the source resource
+    - tag: int               : version of the records parser
+    - close() -> None
+
+    The buffer is bytes or mmap, reading is thread-safe.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        self._sections = []
+        try:
+            self._read_sections()
+        except ValueError:
+            self.close()
+            raise
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError('Table index out of range')
+        start = i * self.fields
+        return tuple(
+            self.group(group_id)
+            for group_id in self._records[start:start + self.fields]
+        )
+
+    def __sizeof__(self):
+        size = object.__sizeof__(self)
+        if not isinstance(self._buffer, mmap.mmap):
+            size += len(self._buffer)
+        return size
+
+    def group(self, i):
+        start, end = self._group_offsets[i], self._group_offsets[i + 1]
+        return tuple(
+            self.string(string_id)
+            for string_id in self._group_items[start:end]
+        )
+
+    def record_ids(self, i):
+        start = i * self.fields
+        return tuple(
+            tuple(self._group_items[
+                self._group_offsets[group_id]:
+                self._group_offsets[group_id + 1]
+            ])
+            for group_id in self._records[start:start + self.fields]
+        )
+
+    @property
+    def strings_count(self):
+        return len(self._string_offsets) - 1
+
+    def string(self, i):
+        start, end = self._string_offsets[i], self._string_offsets[i + 1]
+        return str(self._strings[start:end], 'utf-8')
+
+    def close(self):
+        for section in self._sections:
+            section.release()
+        self._view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def _read_sections(self):
+        if len(self._view) < HEADER.size:
+            raise ValueError('Compiled resource is damaged')
+        (
+            magic, version, self.fields, mtime, size,
+            n_strings, n_groups, n_records, self.tag
+        ) = HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Unsupported compiled resource')
+        self.stamp = (mtime, size)
+        self._length = n_records
+        self._position = HEADER.size
+
+        self._string_offsets = self._section(n_strings + 1)
+        self._group_offsets = self._section(n_groups + 1)
+        self._group_items = self._section(self._group_offsets[-1])
+        self._records = self._section(n_records * self.fields)
+        self._strings = self._view[self._position:]
+        self._sections.append(self._strings)
+        if len(self._strings) != self._string_offsets[-1]:
+            raise ValueError('Compiled resource is damaged')
+
+    def _section(self, count):
+        size = count * ITEMSIZE
+        section = self._view[self._position:self._position + size]
+        if len(section) != size:
+            raise ValueError('Compiled resource is damaged')
+        section = section.cast('I')
+        self._position += size
+        self._sections.append(section)
+        return section
+
+
+def _fresh_header(path, tag):
+    table_path = sidecar_path(path)
+    try:
+        with open(table_path, 'rb') as f_handle:
+            header = f_handle.read(HEADER.size)
+    except OSError:
+        return None
+    if len(header) != HEADER.size:
+        return None
+    magic, version, _, mtime, size, *_, table_tag = fields = HEADER.unpack(
+        header
+    )
+    if (
+        magic == MAGIC
+        and version == VERSION
+        and table_tag == tag
+        and (mtime, size) == source_stamp(path)
+    ):
+        return fields
+    return None
+
+
+def is_fresh(path, tag=0):
+    """ True if the compiled table of path is up to date """
+    return _fresh_header(path, tag) is not None
+
+
+def records_count(path, tag=0):
+    """ returns the number of records of path from its compiled
+    table (only the header is read), None if the table is stale
+    """
+    fields = _fresh_header(path, tag)
+    return None if fields is None else fields[7]
+
+
+def load(path, read_records, tag=0):
+    """Returns the Table of the resource path
+
+    read_records(path) -> Iterable[record] parses the text resource,
+    it is called only if the compiled table is missing or stale,
+    tag is the version of read_records.
+    If the table can't be written (read-only directory), it is
+    kept in memory.
+    """
+    if is_fresh(path, tag):
+        try:
+            return _map(sidecar_path(path))
+        except (OSError, ValueError):
+            pass
+
+    stamp = source_stamp(path)
+    data = build(read_records(path), stamp, tag)
+    try:
+        replace_file(sidecar_path(path), data)
+        return _map(sidecar_path(path))
+    except (OSError, ValueError):
+        return Table(data)
+
+
+class Arrays(dict):
+    """Named arrays of an index sidecar
+
+    'name': memoryview cast to the typecode of the array
+    (array.array if the sidecar can't be written)
+    """
+
+    def __init__(self, arrays=(), buffer=None):
+        super().__init__(arrays)
+        self._buffer = buffer
+
+    def close(self):
+        for view in self.values():
+            if isinstance(view, memoryview):
+                view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+
+def build_arrays(arrays, stamp=(0, 0), tag=0, table_tag=0):
+    """ returns the sidecar of arrays ('name': array.array, bytes) """
+    parts = [INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, *stamp,
+                               tag, VERSION, table_tag, len(arrays))]
+    for name, items in arrays.items():
+        name = name.encode('utf-8')
+        parts.append(ARRAY_HEADER.pack(
+            items.typecode.encode('ascii'), len(name), len(items)
+        ))
+        parts.append(name)
+    for items in arrays.values():
+        data = items.tobytes()
+        # every array starts at an aligned offset
+        parts.append(data + bytes(-len(data) % 8))
+    header_size = sum(map(len, parts[:1 + 2 * len(arrays)]))
+    parts.insert(1 + 2 * len(arrays), bytes(-header_size % 8))
+    return b''.join(parts)
+
+
+def load_arrays(path, table, kind, build_index, tag=0):
+    """Returns Arrays of the index kind of the resource path
+
+    build_index() -> dict 'name': array.array builds the index over
+    table (the Table of path), it is called only if the sidecar is
+    missing or stale, tag is the version of build_index.
+    The index is stale when the table is rebuilt (a new stamp,
+    VERSION or tag of the table), ids in it may change.
+    """
+    index_path = sidecar_path(path, '.{}{}'.format(kind, SUFFIX))
+    stamp = table.stamp
+    try:
+        return _map_arrays(index_path, stamp, tag, table.tag)
+    except (OSError, ValueError):
+        pass
+
+    arrays = build_index()
+    try:
+        replace_file(
+            index_path, build_arrays(arrays, stamp, tag, table.tag)
+        )
+        return _map_arrays(index_path, stamp, tag, table.tag)
+    except (OSError, ValueError):
+        return Arrays(arrays)
+
+
+def _map_arrays(index_path, stamp, tag, table_tag):
+    with open(index_path, 'rb') as f_handle:
+        buffer = mmap.mmap(f_handle.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return _read_arrays(buffer, stamp, tag, table_tag)
+    except ValueError:
+        buffer.close()
+        raise
+
+
+def _read_arrays(buffer, stamp, tag, table_tag):
+    view = memoryview(buffer)
+    try:
+        if len(view) < INDEX_HEADER.size:
+            raise ValueError('Index is damaged')
+        (
+            magic, version, mtime, size, index_tag,
+            version_of_table, tag_of_table, count
+        ) = INDEX_HEADER.unpack_from(view, 0)
+        if (
+            magic != INDEX_MAGIC
+            or version != INDEX_VERSION
+            or index_tag != tag
+            or (mtime, size) != stamp
+            or version_of_table != VERSION
+            or tag_of_table != table_tag
+        ):
+            raise ValueError('Index is stale')
+        position = INDEX_HEADER.size
+        headers = []
+        for _ in range(count):
+            typecode, name_size, length = ARRAY_HEADER.unpack_from(
+                view, position
+            )
+            position += ARRAY_HEADER.size
+            name = str(view[position:position + name_size], 'utf-8')
+            position += name_size
+            headers.append((name, typecode.decode('ascii'), length))
+        position += -position % 8
+        arrays = Arrays(buffer=buffer)
+        for name, typecode, length in headers:
+            size = length * array(typecode).itemsize
+            section = view[position:position + size]
+            if len(section) != size:
+                raise ValueError('Index is damaged')
+            arrays[name] = section.cast(typecode)
+            section.release()
+            position += size + (-size % 8)
+    except (ValueError, struct.error):
+        view.release()
+        raise ValueError('Index is damaged or stale')
+    view.release()
+    return arrays
+
+
+def _map(table_path):
+    with open(table_path, 'rb') as f_handle:
+        buffer = mmap.mmap(f_handle.fileno(), 0, access=mmap.ACCESS_READ)
+    return Table(buffer)
+
+
+def replace_file(path, data):
+    """ writes data (bytes) to the file path atomically: to a unique
+    temporary file first, other processes and threads may read or
+    write the same file
+    """
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix='{}.'.format(name), suffix='.tmp', dir=directory or '.'
+    )
+    try:
+        with os.fdopen(fd, 'wb') as f_handle:
+            f_handle.write(data)
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
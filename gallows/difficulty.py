@@ -0,0 +1,116 @@
+"""Difficulty buckets of words
+
+A word is hard to guess if its letters are rare: the rarity of a
+letter is -log of the share of the words containing it, the score of
+a word is the mean rarity of its distinct letters. Words are split
+into TIERS tiers of equal size by the score (1 - the easiest).
+
+Ids of the words are sorted by (tier, length) once, offsets of every
+(tier, length) bucket are stored (CSR, like multimap.py):
+    offsets[tier * (max_length + 1) + length] : start of the bucket
+so the words of a tier and a range of lengths are one slice of ids,
+a random word of it is picked in constant time. Words longer than
+max_length are in the bucket of max_length.
+"""
+import math
+from array import array
+from collections import Counter
+
+
+TIERS = 3
+
+
+def letter_rarity(words):
+    """ returns 'letter': -log(share of words containing it) """
+    counts = Counter()
+    for word in words:
+        counts.update(set(word))
+    total = len(words)
+    return {
+        letter: -math.log(count / total) for letter, count in counts.items()
+    }
+
+
+def build_arrays(words, max_length, prefix=''):
+    """ returns 'name': array('I') of the buckets of words (sequence) """
+    rarity = letter_rarity(words)
+    scores = [
+        sum(map(rarity.__getitem__, letters)) / len(letters)
+        if letters else 0.0
+        for letters in map(set, words)
+    ]
+    # tiers of equal size by the rank of the score
+    tiers = array('B', bytes(len(words)))
+    by_score = sorted(range(len(words)), key=scores.__getitem__)
+    for rank, id_ in enumerate(by_score):
+        tiers[id_] = rank * TIERS // len(words)
+
+    width = max_length + 1
+    buckets = [
+        tiers[id_] * width + min(len(word), max_length)
+        for id_, word in enumerate(words)
+    ]
+    ids = array('I', sorted(range(len(words)), key=buckets.__getitem__))
+    offsets = array('I', [0]) * (TIERS * width + 1)
+    for bucket in buckets:
+        offsets[bucket + 1] += 1
+    for i in range(TIERS * width):
+        offsets[i + 1] += offsets[i]
+    return {prefix + 'ids': ids, prefix + 'offsets': offsets}
+
+
+class DifficultyBuckets:
+    """Words by tier and length
+
+    - count(min_length, max_length, tier=None) -> int
+      : number of words of the tier (1..TIERS, None - any)
+        with length in [min_length, max_length]
+    - pick(rng, min_length, max_length, tier=None) -> int
+      : random id of such a word (rng is random.Random or
+        the random module), None if there are no words
+    - ids(min_length, max_length, tier=None) -> Iterator[int]
+      : ids of such words
+
+    arrays are the arrays of build_arrays() (array.array or mapped
+    memoryview).
+    """
+
+    def __init__(self, arrays, prefix=''):
+        self._ids = arrays[prefix + 'ids']
+        self._offsets = arrays[prefix + 'offsets']
+        self.max_length = (len(self._offsets) - 1) // TIERS - 1
+
+    def count(self, min_length, max_length, tier=None):
+        return sum(
+            end - start
+            for start, end in self._ranges(min_length, max_length, tier)
+        )
+
+    def pick(self, rng, min_length, max_length, tier=None):
+        ranges = self._ranges(min_length, max_length, tier)
+        total = sum(end - start for start, end in ranges)
+        if not total:
+            return None
+        position = rng.randrange(total)
+        for start, end in ranges:
+            if position < end - start:
+                return self._ids[start + position]
+            position -= end - start
+
+    def ids(self, min_length, max_length, tier=None):
+        for start, end in self._ranges(min_length, max_length, tier):
+            yield from self._ids[start:end]
+
+    def _ranges(self, min_length, max_length, tier):
+        if min_length > max_length:
+            return []
+        width = self.max_length + 1
+        min_length = max(min(min_length, self.max_length), 0)
+        max_length = max(min(max_length, self.max_length), min_length)
+        tiers = range(TIERS) if tier is None else (tier - 1,)
+        offsets = self._offsets
+        return [
+            (offsets[t * width + min_length],
+             offsets[t * width + max_length + 1])
+            for t in tiers
+        ]
@@ -0,0 +1,388 @@
+"""Log of answers and its SQLite store
+
+Every answer of a session is an event:
+    time, mode, resource, key (question), answer, correct, latency
+Events are appended to a segment file (JSON lines) by a background
+thread, the file is flushed and fsynced once per batch. A segment is
+closed when it grows large or old enough (or the log is idle), closed
+segments are compacted into SQLite ('events.sqlite3'):
+- answers : all events, indexed by question and time
+- stats   : answers/mistakes/latency per question, updated by the
+            compaction, so aggregate queries don't scan the answers
+
+Files are in EVENTS_PATH ('~/.gallows/events' or $GALLOWS_HOME/events):
+- <start>-<pid>-<n>.open.jsonl : the segment written by a process
+- <start>-<pid>-<n>.jsonl      : a closed segment, waits for compaction
+A segment is imported in one transaction together with its name,
+so a crash can't import it twice.
+"""
+import atexit
+import glob
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+
+EVENTS_PATH = os.path.join(
+    os.environ.get('GALLOWS_HOME') or os.path.join(
+        os.path.expanduser('~'), '.gallows'
+    ),
+    'events'
+)
+DATABASE = 'events.sqlite3'
+OPEN_SUFFIX = '.open.jsonl'
+SUFFIX = '.jsonl'
+# open segments not modified for this time are left by crashed processes
+# (a live writer closes its segment after idle_timeout)
+STALE_TIME = 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    time REAL NOT NULL,
+    mode TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    key TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    latency REAL
+);
+CREATE INDEX IF NOT EXISTS answers_key
+    ON answers (mode, resource, key, correct);
+CREATE INDEX IF NOT EXISTS answers_time ON answers (time);
+CREATE TABLE IF NOT EXISTS stats (
+    mode TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    key TEXT NOT NULL,
+    answers INTEGER NOT NULL,
+    mistakes INTEGER NOT NULL,
+    latency REAL NOT NULL,
+    last REAL NOT NULL,
+    PRIMARY KEY (mode, resource, key)
+);
+CREATE INDEX IF NOT EXISTS stats_mistakes
+    ON stats (mistakes * 1.0 / answers);
+CREATE TABLE IF NOT EXISTS segments (
+    name TEXT PRIMARY KEY
+);
+"""
+FIELDS = ('time', 'mode', 'resource', 'key', 'answer', 'correct', 'latency')
+
+
+class EventLog:
+    """Append-only log of events, written by a background thread
+
+    - log(**event) -> None
+      : queues the event (FIELDS), doesn't block
+    - flush() -> None
+      : waits until queued events are on the disk
+    - close() -> None
+      : flushes and closes the segment
+    - compact() -> int
+      : imports closed segments into SQLite, returns
+        the number of events
+
+    Events are written when batch_size events are queued or
+    flush_interval seconds have passed. The segment is closed when
+    it exceeds segment_size bytes, segment_age seconds or there are
+    no events for idle_timeout seconds. Closed segments are compacted
+    when their size exceeds compact_size and when the log is started.
+    If the events can't be written, they are dropped.
+    """
+
+    def __init__(self, path=EVENTS_PATH, batch_size=256,
+                 flush_interval=1.0, idle_timeout=60.0,
+                 compact_size=4 * 1024 * 1024,
+                 segment_size=1024 * 1024, segment_age=10 * 60.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.idle_timeout = idle_timeout
+        self.compact_size = compact_size
+        self.segment_size = segment_size
+        self.segment_age = segment_age
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_path = None
+        self._opened = None  # time of the opening of the segment
+        self._closed_size = 0
+        self._segments = 0
+
+    def log(self, **event):
+        event.setdefault('time', time.time())
+        if self._start().is_alive():
+            self._queue.put(event)
+
+    def flush(self):
+        thread = self._thread
+        if thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        while not done.wait(1.0):
+            if not thread.is_alive():
+                return
+
+    def close(self):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def compact(self):
+        return compact(self.path)
+
+    ####### Writer thread ########
+    def _start(self):
+        # returns the writer thread
+        thread = self._thread
+        if thread is not None:
+            return thread
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='gallows-events',
+                    daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.close)
+            return self._thread
+
+    def _run(self):
+        self._compact()
+        batch = []
+        waiters = []
+        deadline = None  # time to write the batch
+        while True:
+            if batch:
+                timeout = max(deadline - time.monotonic(), 0)
+            else:
+                timeout = self.idle_timeout
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False
+            stop = item is None
+            idle = item is False and not batch
+            if isinstance(item, dict):
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+
+            if batch and (
+                stop
+                or waiters
+                or len(batch) >= self.batch_size
+                or time.monotonic() >= deadline
+            ):
+                try:
+                    self._write(batch)
+                except OSError:
+                    # the disk is full or the directory is removed,
+                    # the application must keep working
+                    self._file = None
+                batch = []
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+
+            if stop or idle or self._is_full():
+                # a live writer doesn't keep idle segments (STALE_TIME)
+                self._close_segment()
+            if self._closed_size >= self.compact_size:
+                self._compact()
+            if stop:
+                return
+
+    def _write(self, batch):
+        if self._file is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._segments += 1
+            name = '{}-{}-{}{}'.format(
+                time.strftime('%Y%m%d%H%M%S'),
+                os.getpid(),
+                self._segments,
+                OPEN_SUFFIX
+            )
+            self._file_path = os.path.join(self.path, name)
+            self._file = open(self._file_path, 'at', encoding='utf8')
+            self._opened = time.monotonic()
+        self._file.write(''.join(
+            json.dumps(event, ensure_ascii=False) + '\n' for event in batch
+        ))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _is_full(self):
+        # True if the segment must be closed under steady load
+        if self._file is None:
+            return False
+        return (
+            self._file.tell() >= self.segment_size
+            or time.monotonic() - self._opened >= self.segment_age
+        )
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        try:
+            self._closed_size += self._file.tell()
+            self._file.close()
+            os.replace(
+                self._file_path,
+                self._file_path[:-len(OPEN_SUFFIX)] + SUFFIX
+            )
+        except (OSError, ValueError):
+            # the segment is compacted after STALE_TIME
+            pass
+        self._file = None
+        self._file_path = None
+
+    def _compact(self):
+        try:
+            compact(self.path)
+        except (OSError, sqlite3.Error):
+            # the events stay in the segments until the next compaction
+            return
+        self._closed_size = 0
+
+
+def connect(path=EVENTS_PATH):
+    """ returns a connection to the SQLite store of path """
+    os.makedirs(path, exist_ok=True)
+    connection = sqlite3.connect(os.path.join(path, DATABASE), timeout=30)
+    # readers don't block the compaction
+    connection.execute('PRAGMA journal_mode = WAL')
+    connection.execute('PRAGMA synchronous = NORMAL')
+    connection.execute('PRAGMA cache_size = -65536')  # 64 MiB
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def compact(path=EVENTS_PATH):
+    """Imports closed segments of path into SQLite and removes them
+
+    Returns the number of imported events.
+    """
+    now = time.time()
+    names = sorted(glob.glob(os.path.join(path, '*' + SUFFIX)))
+    segments = []
+    for name in names:
+        if name.endswith(OPEN_SUFFIX):
+            if now - os.path.getmtime(name) < STALE_TIME:
+                continue
+        segments.append(name)
+    if not segments:
+        return 0
+
+    count = 0
+    connection = connect(path)
+    try:
+        for segment in segments:
+            count += _import_segment(connection, segment)
+    finally:
+        connection.close()
+    return count
+
+
+def _import_segment(connection, segment):
+    name = os.path.basename(segment)
+    if name.endswith(OPEN_SUFFIX):
+        name = name[:-len(OPEN_SUFFIX)] + SUFFIX
+    rows = []
+    stats = {}  # (mode, resource, key): [answers, mistakes, latency, last]
+    with open(segment, 'rt', encoding='utf8') as file:
+        for line in file:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                # the last line of a crashed process
+                continue
+            row = tuple(event.get(field) for field in FIELDS)
+            rows.append(row)
+            time_, mode, resource, key, _, correct, latency = row
+            item = stats.get((mode, resource, key))
+            if item is None:
+                item = stats[mode, resource, key] = [0, 0, 0.0, time_]
+            item[0] += 1
+            item[1] += not correct
+            item[2] += latency or 0.0
+            item[3] = max(item[3], time_)
+
+    with connection:
+        imported = connection.execute(
+            'SELECT 1 FROM segments WHERE name = ?', (name,)
+        ).fetchone()
+        if not imported:
+            connection.execute(
+                'INSERT INTO segments (name) VALUES (?)', (name,)
+            )
+            connection.executemany(
+                'INSERT INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)', rows
+            )
+            connection.executemany(
+                """
+                INSERT INTO stats VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (mode, resource, key) DO UPDATE SET
+                    answers = answers + excluded.answers,
+                    mistakes = mistakes + excluded.mistakes,
+                    latency = latency + excluded.latency,
+                    last = max(last, excluded.last)
+                """,
+                (key + tuple(item) for key, item in stats.items())
+            )
+    os.remove(segment)
+    return 0 if imported else len(rows)
+
+
+def worst(path=EVENTS_PATH, limit=50, mode=None, resource=None,
+          min_answers=1):
+    """Returns questions with the highest rate of mistakes
+
+    List of (mode, resource, key, answers, mistakes, average latency),
+    mode and resource filter the questions.
+    """
+    query = """
+        SELECT mode, resource, key, answers, mistakes, latency / answers
+        FROM stats
+        WHERE answers >= ?
+    """
+    params = [min_answers]
+    if mode is not None:
+        query += ' AND mode = ?'
+        params.append(mode)
+    if resource is not None:
+        query += ' AND resource = ?'
+        params.append(resource)
+    query += """
+        ORDER BY mistakes * 1.0 / answers DESC, mistakes DESC
+        LIMIT ?
+    """
+    params.append(limit)
+    connection = connect(path)
+    try:
+        return connection.execute(query, params).fetchall()
+    finally:
+        connection.close()
+
+
+_event_log = None
+_event_log_lock = threading.Lock()
+
+
+def get_event_log():
+    """ returns the shared EventLog of the process """
+    global _event_log
+    with _event_log_lock:
+        if _event_log is None:
+            _event_log = EventLog()
+        return _event_log
@@ -0,0 +1,215 @@
+"""Tolerant matching of answers
+
+Texts are compared normalized: case, 'ё' ('е'), punctuation and
+extra whitespace are ignored. A tolerance k allows up to k typos
+(Levenshtein distance), but not more than one typo per
+LETTERS_PER_TYPO letters of the word, so short words must be exact.
+
+FuzzyIndex finds the words of a resource close to a text without a
+loop over all words: words are indexed by their trigrams, an edit
+changes at most 3 trigrams, so a word within distance k shares at
+least len(trigrams) - 3k trigrams with the text (q-gram lemma), only
+such candidates are checked by the distance.
+
+The index is a set of flat arrays (build_arrays), sorted words and
+trigrams are found by binary search, so the arrays can be stored in
+an index sidecar (compiled.load_arrays) and mapped without a rebuild.
+"""
+import re
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+
+LETTERS_PER_TYPO = 3
+PAD = '\x00'  # marks the start and the end of a word in trigrams
+
+_punctuation = re.compile(r'[^\w\s]|_')
+_spaces = re.compile(r'\s+')
+
+
+def normalize(text):
+    """ returns text without case, 'ё', punctuation and extra spaces """
+    text = _punctuation.sub(' ', text.casefold().replace('ё', 'е'))
+    return _spaces.sub(' ', text).strip()
+
+
+def allowed_typos(word, tolerance):
+    """ returns the number of typos allowed in the normalized word """
+    return min(tolerance, len(word) // LETTERS_PER_TYPO)
+
+
+def distance(first, second, limit):
+    """Returns the Levenshtein distance of strings, limit + 1 if it
+    is greater than limit (the computation stops early)
+    """
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    if len(first) < len(second):
+        first, second = second, first
+    previous = list(range(len(second) + 1))
+    for i, first_char in enumerate(first, 1):
+        current = [i]
+        for j, second_char in enumerate(second, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (first_char != second_char),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+def trigrams(word):
+    padded = PAD * 2 + word + PAD * 2
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def is_close(answer_text, expected, tolerance):
+    """ True if answer_text matches expected with tolerance typos """
+    answer = normalize(answer_text)
+    expected = normalize(expected)
+    if answer == expected:
+        return True
+    limit = allowed_typos(expected, tolerance)
+    return bool(limit) and distance(answer, expected, limit) <= limit
+
+
+def build_arrays(strings, prefix=''):
+    """ returns 'name': array.array of the index of strings """
+    word_ids = defaultdict(list)  # 'normalized word': [string ids]
+    for string_id, text in strings:
+        word_ids[normalize(text)].append(string_id)
+    words = sorted(word_ids)
+    grams = defaultdict(list)  # 'trigram': [word ids]
+    for word_id, word in enumerate(words):
+        for gram in trigrams(word):
+            grams[gram].append(word_id)
+
+    arrays = {}
+    arrays.update(_pack_strings(words, prefix + 'words'))
+    arrays.update(_pack_lists(
+        (word_ids[word] for word in words), prefix + 'ids'
+    ))
+    gram_list = sorted(grams)
+    arrays.update(_pack_strings(gram_list, prefix + 'grams'))
+    arrays.update(_pack_lists(
+        (grams[gram] for gram in gram_list), prefix + 'postings'
+    ))
+    return arrays
+
+
+def _pack_strings(strings, name):
+    blob = bytearray()
+    offsets = array('I', [0])
+    for string in strings:
+        blob += string.encode('utf-8')
+        offsets.append(len(blob))
+    return {name: array('B', blob), name + '_offsets': offsets}
+
+
+def _pack_lists(lists, name):
+    items = array('I')
+    offsets = array('I', [0])
+    for sublist in lists:
+        items.extend(sublist)
+        offsets.append(len(items))
+    return {name: items, name + '_offsets': offsets}
+
+
+class _Strings:
+    """ sorted sequence of strings packed by _pack_strings """
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return str(self._blob[start:end], 'utf-8')
+
+    def index(self, string):
+        """ returns the index of string or None """
+        i = bisect_left(self, string)
+        if i < len(self) and self[i] == string:
+            return i
+        return None
+
+
+class FuzzyIndex:
+    """Trigram index of the strings of a resource
+
+    - find(text, tolerance) -> List[(distance, ids)]
+      : normalized words close to text, ids are the ids of the
+        strings given to build_arrays, sorted by distance
+    - words: Sequence[str] : sorted normalized words
+
+    arrays are the arrays of build_arrays() (array.array or mapped
+    memoryview) with the names starting with prefix.
+    """
+
+    def __init__(self, arrays, prefix=''):
+        self._arrays = [
+            items for name, items in arrays.items() 
+            if name.startswith(prefix)
+        ]
+        self.words = _Strings(
+            arrays[prefix + 'words'], arrays[prefix + 'words_offsets']
+        )
+        self._ids = (arrays[prefix + 'ids'], arrays[prefix + 'ids_offsets'])
+        self._grams = _Strings(
+            arrays[prefix + 'grams'], arrays[prefix + 'grams_offsets']
+        )
+        self._postings = (
+            arrays[prefix + 'postings'], arrays[prefix + 'postings_offsets']
+        )
+
+    def __len__(self):
+        return len(self.words)
+
+    def __sizeof__(self):
+        # mapped arrays are not in the memory of the process
+        size = object.__sizeof__(self)
+        for items in self._arrays:
+            if isinstance(items, array):
+                size += items.itemsize * len(items)
+        return size
+
+    def find(self, text, tolerance=0):
+        word = normalize(text)
+        exact = self.words.index(word)
+        found = [] if exact is None else [(0, self._string_ids(exact))]
+        limit = allowed_typos(word, tolerance)
+        if not limit:
+            return found
+
+        query = trigrams(word)
+        threshold = len(query) - 3 * limit
+        postings, offsets = self._postings
+        shared = defaultdict(int)
+        for gram in query:
+            gram_id = self._grams.index(gram)
+            if gram_id is None:
+                continue
+            for word_id in postings[offsets[gram_id]:offsets[gram_id + 1]]:
+                shared[word_id] += 1
+        close = []
+        for word_id, count in shared.items():
+            if count < threshold or word_id == exact:
+                continue
+            word_distance = distance(word, self.words[word_id], limit)
+            if word_distance <= limit:
+                close.append((word_distance, self._string_ids(word_id)))
+        close.sort()
+        return found + close
+
+    def _string_ids(self, word_id):
+        ids, offsets = self._ids
+        return tuple(ids[offsets[word_id]:offsets[word_id + 1]])
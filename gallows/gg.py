@@ -12,12 +12,17 @@ To continue, select the mode you need in the Mode
 list. Then, select the resource in the list of 
 resources. If possible, configure the settings 
 (Setting button) and press Run button for start.
+
+Dictionaries and tests can be merged: type the
+names of resources separated by ';'.
 """
 
-import os
 import tkinter as tk
 
-from .modes import modes
+from . import replay
+from .modes import RESOURCES_SEPARATOR
+from .registry import get_specs
+from .session import Session
 from .view import SettingsDialog, View
 
 
@@ -26,22 +31,32 @@ class GallowsGame:
     INIT = 'init'
     MODE = 'mode'
     RESOURCE = 'resource'
+    LOADING = 'loading'
     TASK = 'task'
 
     title = 'Gallows Game'
     info = INFO #'Start programm text'
+    loading_info = 'Loading…'
     chars_limit = 50
+    resources_limit = 100  # items in the Resource list
+    poll_interval = 50  # ms, check of the resource loading
 
     def __init__(self):
         
-        # dict of pairs 'mode_name': ModeClass
-        self.modes = {
-            mode.get_name():mode for mode in modes
-        }
+        # dict of pairs 'mode_name': ModeSpec, 
+        # the module of the mode is imported when it is selected,
+        # third-party modes are added after the start (_load_plugins)
+        self.modes = get_specs(entry_points=False)
         self.window = View(tk.Tk())
         self.window.master.title(self.title)
         self.window.master.resizable(False, False)
 
+        # resources are parsed in the worker, Tk stays responsive
+        self._executor = None  # created by the first Run
+        self._loading = None
+        # typed names of the merged resources before the last one
+        self._resources_head = ''
+
         self._set_state(self.INIT)
         self._bind_events()
 
@@ -52,12 +67,26 @@ class GallowsGame:
         display app info and launch Tk mainloop
         
         """
+        self._update_modes()
+        self.window.master.after_idle(self._load_plugins)
+
+        self.window.display = self.info
+        self.window.launch()
+        if self._executor is not None:
+            # a single worker: only the loading task can be pending
+            # (shutdown(cancel_futures=True) needs python 3.9)
+            if self._loading is not None:
+                self._loading.cancel()
+            self._executor.shutdown(wait=False)
+
+    def _update_modes(self):
         modes_names = list(self.modes.keys())
         modes_combobox = self.window.widgets['modes']
         modes_combobox.config(values=modes_names)
 
-        self.window.display = self.info
-        self.window.launch()
+    def _load_plugins(self):
+        self.modes = get_specs()
+        self._update_modes()
 
     def _bind_events(self):
         window = self.window
@@ -67,6 +96,8 @@ class GallowsGame:
         # Resource Combobox
         resources_box = window.widgets['resources']
         resources_box.bind('<<ComboboxSelected>>', self._resource_select)
+        resources_box.bind('<KeyRelease>', self._resource_typed)
+        resources_box.bind('<Return>', self._resource_complete)
         # Settings Button
         s_button = window.widgets['settings_button']
         s_button.bind('<Return>', self._open_settings)
@@ -89,6 +120,11 @@ class GallowsGame:
         window = self.window
         widgets = window.widgets
 
+        if state != self.LOADING and self._loading is not None:
+            # the result of the loading is not needed anymore
+            self._loading.cancel()
+            self._loading = None
+
         if state == self.INIT:
             self.current_mode = None
             self.current_settings = None
@@ -111,9 +147,11 @@ class GallowsGame:
             self.current_task = None
 
             window.selected_resource.set('')
+            self._resources_head = ''
 
             widgets['modes'].config(state='readonly')
-            widgets['resources'].config(state='readonly')
+            # editable, typed text filters the list of resources
+            widgets['resources'].config(state=tk.NORMAL)
             if hasattr(mode, 'settings') and mode.settings:
                 widgets['settings_button'].config(state=tk.NORMAL)
             else:
@@ -126,6 +164,14 @@ class GallowsGame:
             widgets['run_button'].config(state=tk.NORMAL)
             widgets['run_button'].focus()
 
+        elif state == self.LOADING:
+            widgets['modes'].config(state=tk.DISABLED)
+            widgets['resources'].config(state=tk.DISABLED)
+            widgets['settings_button'].config(state=tk.DISABLED)
+            widgets['run_button'].config(state=tk.DISABLED)
+            widgets['input'].config(state=tk.DISABLED)
+            widgets['reset_button'].focus()
+
         elif state == self.TASK:
             widgets['modes'].config(state=tk.DISABLED)
             widgets['resources'].config(state=tk.DISABLED)
@@ -144,19 +190,16 @@ class GallowsGame:
         if not input_value:
             return
         input_text.set('')
-        self.current_task.on_answer(input_value)
+        self._render(self.current_task.answer(input_value))
 
     def _mode_select(self, event=None):
         window = self.window
         mode_name = window.selected_mode.get()
-        mode_cls = self.modes[mode_name]
+        mode_cls = self.modes[mode_name].load()
         self.current_mode = mode_cls
 
         window.display = mode_cls.info
-        res_names = mode_cls.get_resources_names()
-
-        resources_box = window.widgets['resources']
-        resources_box.config(values=res_names)
+        self._update_resources('')
 
         self._set_state(self.MODE)
 
@@ -180,32 +223,136 @@ class GallowsGame:
         self.window.display = self.info
 
     def _resource_select(self, event=None):
+        if self._resources_head:
+            # the list item replaces only the last typed name
+            selected = self.window.selected_resource.get()
+            self.window.selected_resource.set(
+                self._resources_head + selected
+            )
+        self._show_resources_info(self.window.selected_resource.get())
         self._set_state(self.RESOURCE)
 
+    def _resource_typed(self, event=None):
+        text = self.window.selected_resource.get()
+        self._resources_head, prefix = self._split_resources(text)
+        self._update_resources(prefix)
+        run_button = self.window.widgets['run_button']
+        if self.current_mode.has_resource(text):
+            run_button.config(state=tk.NORMAL)
+        else:
+            run_button.config(state=tk.DISABLED)
+
+    def _resource_complete(self, event=None):
+        text = self.window.selected_resource.get()
+        head, prefix = self._split_resources(text)
+        found = self.current_mode.get_catalog().search(prefix)
+        if prefix not in found and len(found) == 1:
+            text = head + found[0]
+            self.window.selected_resource.set(text)
+        if self.current_mode.has_resource(text):
+            self._resources_head = ''
+            self._resource_select()
+
+    def _show_resources_info(self, resource_name):
+        """ shows the mode info and the metadata of the resources """
+        from .catalog import describe
+
+        mode_cls = self.current_mode
+        catalog = mode_cls.get_catalog()
+        lines = [mode_cls.info, '']
+        for name in mode_cls.split_resource_name(resource_name):
+            try:
+                lines.append(describe(catalog.info(name)))
+            except (KeyError, OSError):
+                # removed or still typed
+                pass
+        self.window.display = '\n'.join(lines)
+
+    def _split_resources(self, text):
+        """ returns (names before the last one, the last name) """
+        if not self.current_mode.multi_resource:
+            return '', text
+        head, separator, last = text.rpartition(RESOURCES_SEPARATOR.strip())
+        if not separator:
+            return '', last.strip()
+        names = self.current_mode.split_resource_name(head)
+        head = ''.join(name + RESOURCES_SEPARATOR for name in names)
+        return head, last.strip()
+
+    def _update_resources(self, prefix):
+        """ shows resources of the current mode starting with prefix,
+        returns all of them
+        """
+        found = self.current_mode.get_catalog().search(prefix)
+        resources_box = self.window.widgets['resources']
+        resources_box.config(values=found[:self.resources_limit])
+        return found
+
     def _run_task(self, event=None):
         mode_cls = self.current_mode
         window = self.window
         resource_name = window.selected_resource.get()
-        settings = None
-
-        if self.current_settings:
-            settings = self.current_settings
-        elif hasattr(mode_cls, 'settings') and mode_cls.settings:
-            settings = {
-                k:v.get() for k,v in mode_cls.settings.items()
-            }
-
-        task = mode_cls(
-            # Because display now is a property object in window
-            window=self.window,
-            resource_name=resource_name,
-            settings=settings,
-            on_exit=self._show_results
+        settings = (
+            self.current_settings or mode_cls.get_default_settings()
+        )
+
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=1)
+
+        # parsing and launch (sampling, the history) run in the worker
+        future = self._executor.submit(
+            self._start_session, 
+            mode_cls, 
+            resource_name, 
+            settings
         )
-        self.current_task = task
+        self._set_state(self.LOADING)
+        self._loading = future
+        window.display = self.loading_info
+        self._poll_task(future)
+
+    def _poll_task(self, future):
+        if future is not self._loading:
+            # canceled by Reset
+            return
+        if not future.done():
+            self.window.master.after(
+                self.poll_interval, 
+                self._poll_task, 
+                future
+            )
+            return
+
+        self._loading = None
+        error = future.exception()
+        if error is not None:
+            self._show_results('Loading error: {}'.format(error))
+            return
+
+        session, frame = future.result()
+        self.current_task = session
 
         self._set_state(self.TASK)
-        task.launch()
+        self._render(frame)
+
+    @staticmethod
+    def _start_session(mode_cls, resource_name, settings):
+        """ returns the started Session and its first frame """
+        session = Session(
+            mode_cls, 
+            resource_name, 
+            settings, 
+            history=not replay.is_recording()
+        )
+        return session, session.start()
+
+    def _render(self, frame):
+        """ View is the adapter of the session frames """
+        if frame.finished:
+            self._show_results(frame.text)
+        else:
+            self.window.display = frame.text
 
     def _show_results(self, result_text=''):
         self.window.display = result_text
@@ -0,0 +1,185 @@
+"""Batch grading of answers collected offline
+
+Submissions are rows of a CSV file (with a header) or JSON lines:
+- id       : (optional) submission id, copied to the result
+- question : the question as it was shown
+- answer   : the answer text, as it is typed in the mode
+- options  : (TestMode) shown options, list or 'a | b | c'
+They are graded by Mode.grader() with the rules of on_answer.
+
+Rows are read and written as a stream, chunks of rows are graded in
+a process pool (every worker loads the compiled resource once).
+Results are JSON lines in the order of the submissions.
+"""
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+
+
+_grader = None  # grader of the worker process
+
+
+def read_submissions(path, format_=None):
+    """Yields submissions of the CSV or JSONL file path
+
+    JSON lines are yielded as text, they are parsed by the workers.
+    """
+    if format_ is None:
+        format_ = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+    with open(path, 'rt', encoding='utf8', newline='') as file:
+        if format_ == 'csv':
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield line
+
+
+def grade_submission(grader, submission):
+    """ returns the result (dict) of submission (dict or JSON text) """
+    try:
+        if isinstance(submission, str):
+            submission = json.loads(submission)
+        result = {'id': submission.get('id')}
+    except (ValueError, AttributeError):
+        return {'id': None, 'correct': False, 'error': 'Invalid JSON'}
+    try:
+        result.update(grader(submission))
+        result['error'] = None
+    except KeyError as error:
+        result.update(correct=False, error='No field {}'.format(error))
+    except (TypeError, ValueError) as error:
+        result.update(correct=False, error=str(error))
+    return result
+
+
+def _init_worker(mode_name, resource_name, settings):
+    global _grader
+    from .registry import get_mode
+
+    _grader = get_mode(mode_name).grader(resource_name, settings)
+
+
+def _grade_chunk(submissions):
+    # results are serialized here, the main process only writes them
+    lines = []
+    counts = {'rows': 0, 'correct': 0, 'wrong': 0, 'invalid': 0}
+    for submission in submissions:
+        result = grade_submission(_grader, submission)
+        counts['rows'] += 1
+        if result['error'] is not None:
+            counts['invalid'] += 1
+        elif result['correct']:
+            counts['correct'] += 1
+        else:
+            counts['wrong'] += 1
+        lines.append(json.dumps(result, ensure_ascii=False))
+    lines.append('')
+    return '\n'.join(lines), counts
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def grade(mode_name, resource_name, submissions, output, settings=None,
+          workers=None, chunk_size=1000):
+    """Grades submissions (iterable of dicts or JSON lines), writes
+    results to output (text file)
+
+    Returns totals: rows, correct, wrong, invalid, seconds, rows_per_second.
+    workers=1 grades in this process.
+    """
+    from .registry import get_mode
+
+    mode_cls = get_mode(mode_name)
+    if mode_cls.grader is None:
+        raise ValueError('Mode {} can\'t grade answers'.format(mode_name))
+    if resource_name not in mode_cls.get_catalog():
+        raise ValueError('Unknown resource {}'.format(resource_name))
+    settings = settings or mode_cls.get_default_settings()
+    if mode_cls._read_records:
+        # workers only map the compiled table
+        mode_cls.compile_resource(resource_name)
+
+    totals = {'rows': 0, 'correct': 0, 'wrong': 0, 'invalid': 0}
+
+    def write(graded):
+        text, counts = graded
+        output.write(text)
+        for key, value in counts.items():
+            totals[key] += value
+
+    start = time.perf_counter()
+    chunks = _chunks(submissions, chunk_size)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(mode_name, resource_name, settings)
+        for chunk in chunks:
+            write(_grade_chunk(chunk))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(mode_name, resource_name, settings)
+        ) as executor:
+            # a bounded number of chunks in flight, results in order
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_grade_chunk, chunk))
+                if len(pending) >= workers * 2:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+
+    seconds = time.perf_counter() - start
+    totals['seconds'] = seconds
+    totals['rows_per_second'] = totals['rows'] / seconds if seconds else 0.0
+    return totals
+
+
+def main(args):
+    """ 'python -m gallows grade' command """
+    from .registry import get_specs
+
+    specs = get_specs()
+    if args.mode not in specs:
+        sys.exit('Unknown mode name')
+    settings = specs[args.mode].load().get_default_settings()
+    if args.reverse:
+        settings['reverse'] = True
+    output = sys.stdout
+    if args.output:
+        output = open(args.output, 'wt', encoding='utf8')
+    try:
+        totals = grade(
+            args.mode,
+            args.resource,
+            read_submissions(args.submissions, args.format),
+            output,
+            settings=settings,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+        )
+    except ValueError as error:
+        sys.exit(str(error))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(
+        '{rows} rows: {correct} correct, {wrong} wrong, {invalid} invalid, '
+        '{seconds:.2f} s, {rows_per_second:.0f} rows/s'.format(**totals),
+        file=sys.stderr
+    )
@@ -0,0 +1,197 @@
+"""Per-user history of answers
+
+The history of a resource is a JSON file in HISTORY_PATH
+('~/.gallows/history' or $GALLOWS_HOME/history):
+    {'question key': [right, wrong, last answer time, record index]}
+histories of the users of the server are in HISTORY_PATH/users/<id>.
+
+Questions are chosen by weight: the (smoothed) error rate of the
+question multiplied by its recency factor, so wrong answered and
+long forgotten questions are asked more often, unseen questions
+have the weight of a half-known one asked long ago.
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from .sampling import WeightedSampler
+
+
+HISTORY_PATH = os.path.join(
+    os.environ.get('GALLOWS_HOME') or os.path.join(
+        os.path.expanduser('~'), '.gallows'
+    ),
+    'history'
+)
+DAY = 24 * 60 * 60
+USER_PATTERN = re.compile(r'[0-9A-Za-z_-]{1,64}\Z')
+MAX_HISTORIES = 256  # kept in memory
+
+
+def weight(entry, now):
+    """ returns the weight of the history entry (None - unseen) """
+    if entry is None:
+        return 1.0
+    right, wrong, last, _ = entry
+    error_rate = (wrong + 1) / (right + wrong + 2)
+    # from 1 (just answered) to 2 (answered long ago)
+    recency = 2 - math.exp(-max(now - last, 0) / DAY)
+    return error_rate * recency
+
+
+class AnswerHistory:
+    """History of answers of one resource
+
+    - record(key, index, correct) -> None
+      : adds the answer, updates the weight of index
+    - sampler(table, key_of) -> sampling.WeightedSampler
+      : weighted sampler of the records of table,
+        key_of(record) -> str is the question key
+    - save() -> bool
+    - entries: dict : 'key': [right, wrong, last, index]
+
+    The sampler is built once for a table, then it is updated
+    by record() in O(log n), an empty history samples uniformly
+    without it. A history without path is empty and is not saved
+    (reproducible sessions, see replay.py).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {} if path is None else self._read(path)
+        self._lock = threading.Lock()
+        self._table = None
+        self._sampler = None
+        self._changed = False
+
+    def record(self, key, index, correct, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = [0, 0, now, index]
+            entry[0 if correct else 1] += 1
+            entry[2] = now
+            if index is not None:
+                entry[3] = index
+            if self._sampler is not None and index is not None:
+                self._sampler.update(index, weight(entry, now))
+            self._changed = True
+
+    def sampler(self, table, key_of, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            if self._table is not table:
+                self._sampler = self._build(table, key_of, now)
+                self._table = table
+            return self._sampler
+
+    def sample(self, table, key_of, k, rng):
+        """ returns up to k distinct weighted random indexes of table """
+        with self._lock:
+            uniform = not self.entries and self._sampler is None
+        if uniform:
+            # all the weights are equal, the O(n) sampler isn't needed
+            return rng.sample(range(len(table)), min(k, len(table)))
+        sampler = self.sampler(table, key_of)
+        with self._lock:
+            return sampler.sample_distinct(k, rng)
+
+    def save(self):
+        """ writes the history, False if it can't be written """
+        with self._lock:
+            if not self._changed or self.path is None:
+                return True
+            data = json.dumps(self.entries, ensure_ascii=False)
+            self._changed = False
+        from .compiled import replace_file
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            replace_file(self.path, data.encode('utf-8'))
+        except OSError:
+            # the task must not fail because of the history
+            self._changed = True
+            return False
+        return True
+
+    def _build(self, table, key_of, now):
+        weights = [weight(None, now)] * len(table)
+        lost = {}
+        for key, entry in self.entries.items():
+            index = entry[3]
+            if index is None:
+                # removed from the resource
+                continue
+            # indexes are checked, the resource may be edited
+            if index < len(table) and key_of(table[index]) == key:
+                weights[index] = weight(entry, now)
+            else:
+                lost[key] = entry
+        if lost:
+            # one pass over the table to find moved questions
+            for index, record in enumerate(table):
+                entry = lost.pop(key_of(record), None)
+                if entry is not None:
+                    entry[3] = index
+                    weights[index] = weight(entry, now)
+                    self._changed = True
+                    if not lost:
+                        break
+            for entry in lost.values():
+                entry[3] = None
+                self._changed = True
+        return WeightedSampler(weights)
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, 'rt', encoding='utf8') as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        return entries
+
+
+_histories = OrderedDict()
+_histories_lock = threading.Lock()
+
+
+def is_valid_user(user):
+    """ True if user can be the id of a user (see get_history) """
+    return isinstance(user, str) and USER_PATTERN.match(user) is not None
+
+
+def get_history(mode_name, resource_name, variant='', user=None):
+    """Returns the shared AnswerHistory of the resource
+
+    variant separates histories of one resource, e.g. of the
+    reverse direction of a dictionary. user is the id of a user
+    of the server (see is_valid_user), None is the local user.
+    The least recently used histories are dropped from memory
+    (they are saved at the end of every task).
+    """
+    file_name = '{}{}.json'.format(
+        resource_name, '.' + variant if variant else ''
+    )
+    directory = HISTORY_PATH
+    if user is not None:
+        if not is_valid_user(user):
+            raise ValueError('Invalid user id {!r}'.format(user))
+        directory = os.path.join(HISTORY_PATH, 'users', user)
+    path = os.path.join(directory, mode_name, file_name)
+    with _histories_lock:
+        history = _histories.get(path)
+        if history is None:
+            history = _histories[path] = AnswerHistory(path)
+            if len(_histories) > MAX_HISTORIES:
+                _histories.popitem(last=False)
+        else:
+            _histories.move_to_end(path)
+        return history
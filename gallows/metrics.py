@@ -0,0 +1,180 @@
+"""Timing spans of the hot paths
+
+Spans are measured only if metrics are enabled: by the environment
+variable GALLOWS_METRICS (path of the JSON report) or by the option
+'python -m gallows --metrics FILE'. Otherwise span() returns a shared
+empty context manager, so the instrumented code pays one call.
+
+Durations of every span name are aggregated in a histogram with
+logarithmic buckets (about 5% wide), the report is written at the
+exit of the process:
+    {'spans': {'name': {count, total_ms, max_ms, p50_ms, p95_ms, p99_ms}}}
+Span names are 'ModeClass.parse_resource', 'ModeClass.launch',
+'ModeClass.on_answer', 'ModeClass.on_exit' and 'View.redraw'.
+
+GALLOWS_PROFILE (or --profile FILE) profiles the first session with
+cProfile (only the calls of the mode, not the idle time of the GUI),
+the stats are written to FILE when the session is finished, see
+'python -m pstats FILE'.
+"""
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+BUCKET_BASE = 1.05  # relative width of the histogram buckets
+
+_null = nullcontext()
+_recorder = None
+_profile_path = None
+_profile_lock = threading.Lock()
+
+
+class Histogram:
+    """Histogram of durations (seconds) with logarithmic buckets
+
+    - add(seconds) -> None
+    - percentile(p) -> float : upper bound of the bucket of p (0-100)
+    - summary() -> dict      : count, total, max and percentiles (ms)
+    """
+
+    __slots__ = ('count', 'total', 'max', '_buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._buckets = {}  # bucket number: count
+
+    def add(self, seconds):
+        # bucket n holds (BUCKET_BASE ** (n - 1), BUCKET_BASE ** n] us
+        bucket = math.ceil(math.log(max(seconds * 1e6, 1.0), BUCKET_BASE))
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        rank = math.ceil(self.count * p / 100)
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                return min(BUCKET_BASE ** bucket / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total_ms': self.total * 1000,
+            'max_ms': self.max * 1000,
+            'p50_ms': self.percentile(50) * 1000,
+            'p95_ms': self.percentile(95) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+        }
+
+
+class Recorder:
+    """ histograms of spans, spans can end in any thread """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    def report(self):
+        with self._lock:
+            return {
+                'spans': {
+                    name: histogram.summary()
+                    for name, histogram in sorted(self._histograms.items())
+                }
+            }
+
+    def dump(self, path=None):
+        import json
+
+        path = path or self.path
+        with open(path, 'w', encoding='utf8') as f_handle:
+            json.dump(self.report(), f_handle, indent=2, ensure_ascii=False)
+            f_handle.write('\n')
+
+
+def enable(path=None, profile_path=None):
+    """Enables spans (the report is written to path at the exit)
+    and the profile of the first session (to profile_path)
+    """
+    global _recorder, _profile_path
+    import atexit
+
+    if path and _recorder is None:
+        _recorder = Recorder(path)
+        atexit.register(_recorder.dump)
+    if profile_path:
+        _profile_path = profile_path
+
+
+def enabled():
+    return _recorder is not None
+
+
+def span(name):
+    """ context manager measuring the duration of the block """
+    if _recorder is None:
+        return _null
+    return _recorder.span(name)
+
+
+def report():
+    """ returns the report (see the module doc), None if disabled """
+    return None if _recorder is None else _recorder.report()
+
+
+class SessionProfile:
+    """cProfile of one session
+
+    - measure() -> context manager : profiles the calls inside
+    - finish() -> None             : writes the stats to path
+    """
+
+    def __init__(self, path):
+        import cProfile
+
+        self.path = path
+        self._profile = cProfile.Profile()
+
+    def measure(self):
+        return self._profile
+
+    def finish(self):
+        self._profile.dump_stats(self.path)
+
+
+def profile_session():
+    """ returns SessionProfile for the first session, then None """
+    global _profile_path
+
+    with _profile_lock:
+        path, _profile_path = _profile_path, None
+    return None if path is None else SessionProfile(path)
+
+
+enable(os.environ.get('GALLOWS_METRICS'), os.environ.get('GALLOWS_PROFILE'))
@@ -0,0 +1,295 @@
+""" Contains abc Mode, built-in modes are in submodules 
+(see registry.py) 
+"""
+import abc
+import os
+import random
+
+#  Directory of the default resources of modes
+RESOURCES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'resources'
+)
+
+#  List of modes, imported in the program (see registry.py)
+modes = []
+
+#  Separator of the names of a union of resources (see Mode.multi_resource)
+RESOURCES_SEPARATOR = '; '
+
+#  Decorator to include the mode in the program
+def mode(mode_class):
+    modes.append(mode_class)
+    return mode_class
+
+
+class Mode(abc.ABC):
+    """Abstract mode class, provides base functional:
+    
+    Class variables:
+    - display: const property 
+      : variable to display text on the screen
+    - append_display(text) -> None
+      : adds text to the end of display
+    - display_batch() -> context manager
+      : display updates inside are drawn once
+
+    window is a session.Screen (see session.Session, the GUI 
+    renders its frames), any object with a 'display' text 
+    attribute works, batch() of it is optional.
+
+    - info: str    : mode description for user
+    - name: str    : mode name in UI
+    - path: str    : path to mode resources 
+                    (default: .resources/mode_name)
+    - settings: List[Setting]  
+      : dictionary of settings like 
+      'name': Setting(variables)
+      'name' use in UI if no take 'title'
+    - parse_settings: Tuple[str]
+      : names of settings used by _parse_resource,
+      parsed data is cached separately for their values
+    - multi_resource: bool
+      : resource_name can be several names joined by
+      RESOURCES_SEPARATOR, their parsed data is merged 
+      by _merge_resources
+
+    - get_name() -> str
+      : returns mode.name or mode.__name__
+    - get_path() -> str
+      : returns mode.path, sets the default one 
+      if it is not defined
+    - get_resources_names() -> List[str]
+      : returns all file names in mode.path 
+      directory (sorted)
+    - get_catalog() -> catalog.ResourceCatalog
+      : cached catalog of mode.path, prefix 
+      search and metadata of resources
+    - split_resource_name(resource_name) -> List[str]
+      : names of the resources of resource_name
+    - has_resource(resource_name) -> bool
+      : True if all the resources exist
+    - get_default_settings() -> dict
+      : returns default values of mode.settings
+    - get_state() -> dict
+      : structured state of the task for non-text 
+      UIs (see session.Session)
+    - _report(key, answer_text, correct) -> None
+      : reports the answer to the question key 
+      (see events.py), call it from on_answer
+    - _get_history(variant='') -> history.AnswerHistory
+      : history of answers of the resource (of the 
+      user if history is a user id, see history.py), 
+      an empty one if the task has no history
+    - rng: random.Random
+      : random generator of the task, modes must 
+      not use the random module (see replay.py)
+
+    Mode interface:
+    - _parse_resource(file_path: str) -> data
+      : open (archives.open_text, resources can be 
+      compressed) and parse the file to get the data 
+      for the mode, the data is cached and shared 
+      between tasks (see cache.resource_cache), 
+      so it must not be modified
+    - _read_records(file_path) -> Iterable[tuple]
+      : (optional) parse the text file to records 
+      for the compiled table (see compiled.py), 
+      use _load_table(file_path) to get it, 
+      increase records_version if records change
+    - _merge_resources(file_paths, resources) -> data
+      : (multi_resource) returns the data of the union 
+      of resources (parsed data of file_paths)
+    - grader(resource_name, settings) -> callable
+      : (optional) classmethod, returns a function 
+      grading a submission dict (question, answer ...) 
+      like on_answer, returns a dict with 'correct' 
+      or raises ValueError (see grading.py)
+    - on_answer(answer_text) -> None
+      : handles user input
+    - launch() -> None  
+      : displays initial data at startup,
+        use it as constructor
+
+    """
+    info = 'Set resource and settings and Run task'
+    parse_settings = ()
+    records_version = 0
+    multi_resource = False
+
+    def __init__(self, *, window, resource_name, on_exit, settings=None,
+                 on_event=None, rng=None, history=True):
+        if settings:
+            self.settings = settings
+
+        self.rng = random.Random() if rng is None else rng
+        self._use_history = history
+        self._window = window
+        self._on_exit = on_exit
+        self._on_event = on_event
+        self._resource_name = resource_name
+        self._resource_path = os.path.join(self.get_path(), resource_name)
+        self._resource = self._load_resource(resource_name)
+    
+    @property
+    def display(self):
+        return self._window.display
+
+    @display.setter
+    def display(self, text):
+        self._window.display = text
+
+    def append_display(self, text):
+        self._window.display += text
+
+    def display_batch(self):
+        batch = getattr(self._window, 'batch', None)
+        if batch is None:
+            from contextlib import nullcontext
+            return nullcontext()
+        return batch()
+
+    @classmethod
+    def get_name(cls):
+        return cls.name if hasattr(cls, 'name') else cls.__name__
+
+    @classmethod
+    def get_default_settings(cls):
+        settings = getattr(cls, 'settings', None) or {}
+        return {k:v.get() for k,v in settings.items()}
+
+    @classmethod
+    def get_path(cls):
+        if not hasattr(cls, 'path'):
+            cls.path = os.path.join(
+                RESOURCES_PATH,
+                cls.get_name().lower()
+            )
+        return cls.path
+
+    @classmethod
+    def compile_resource(cls, resource_name):
+        """ build the compiled table if it is stale,
+        returns the number of records 
+        """
+        from .. import compiled
+
+        file_path = os.path.join(cls.get_path(), resource_name)
+        table = compiled.load(
+            file_path, 
+            cls._read_records, 
+            cls.records_version
+        )
+        length = len(table)
+        table.close()
+        return length
+
+    @classmethod
+    def get_catalog(cls):
+        from ..catalog import get_catalog
+
+        return get_catalog(cls.get_path(), cls.records_version)
+
+    @classmethod
+    def get_resources_names(cls):
+        # the directory is rescanned only when it changes
+        return cls.get_catalog().names()
+
+    @classmethod
+    def split_resource_name(cls, resource_name):
+        if not cls.multi_resource:
+            return [resource_name]
+        return [
+            name.strip() 
+            for name in resource_name.split(RESOURCES_SEPARATOR.strip())
+            if name.strip()
+        ]
+
+    @classmethod
+    def has_resource(cls, resource_name):
+        names = cls.split_resource_name(resource_name)
+        catalog = cls.get_catalog()
+        return bool(names) and all(name in catalog for name in names)
+
+    def get_state(self):
+        return {}
+
+    def _report(self, key, answer_text, correct):
+        if self._on_event is not None:
+            self._on_event(key, answer_text, correct)
+
+    def _get_history(self, variant=''):
+        from ..history import AnswerHistory, get_history
+
+        if not self._use_history:
+            return AnswerHistory(None)
+        user = None if self._use_history is True else self._use_history
+        return get_history(
+            self.get_name(), self._resource_name, variant, user
+        )
+
+    @abc.abstractmethod
+    def on_answer(self, answer_text):
+        """ """
+
+    @abc.abstractmethod
+    def launch(self):
+        """ """
+        
+    @abc.abstractmethod
+    def _parse_resource(self, file_path):
+        """ """
+
+    _read_records = None
+    grader = None
+
+    def _load_table(self, file_path):
+        from .. import compiled
+
+        return compiled.load(
+            file_path, 
+            self._read_records, 
+            self.records_version
+        )
+
+    def _load_resource(self, resource_name):
+        names = self.split_resource_name(resource_name)
+        if len(names) == 1:
+            return self._load_file(self._resource_path)
+
+        from ..cache import resource_cache
+
+        # every file is parsed and cached on its own, 
+        # the union is cached while they are not reparsed
+        file_paths = [os.path.join(self.get_path(), name) for name in names]
+        resources = [self._load_file(file_path) for file_path in file_paths]
+        key = (
+            type(self),
+            tuple(file_paths),
+            tuple(self.settings[name] for name in self.parse_settings),
+            tuple(map(id, resources)),
+        )
+        return resource_cache.get(
+            key, 
+            file_paths[0], 
+            lambda: self._merge_resources(file_paths, resources)
+        )
+
+    def _load_file(self, file_path):
+        key = (
+            type(self),
+            file_path,
+            tuple(self.settings[name] for name in self.parse_settings),
+        )
+        # the cache is not needed until the first task (startup time)
+        from .. import metrics
+        from ..cache import resource_cache
+
+        def parse():
+            with metrics.span(type(self).__name__ + '.parse_resource'):
+                return self._parse_resource(file_path)
+
+        return resource_cache.get(key, file_path, parse)
+
+    def _merge_resources(self, file_paths, resources):
+        raise NotImplementedError
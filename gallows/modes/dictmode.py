@@ -0,0 +1,345 @@
+""" Dictionary mode """
+import os
+from collections import namedtuple
+
+from . import Mode, mode
+from ..archives import open_text, text_size
+from ..fuzzy import FuzzyIndex, build_arrays as build_words, is_close
+from ..multimap import BiMultimap, build_arrays as build_links
+from ..report import Report
+from ..sampling import reservoir_sample
+from ..setting import Setting
+from ..union import RecordsUnion, key_hashes
+
+
+# table: compiled.Table of (questions, answers)
+# index: multimap.BiMultimap of questions and answers
+# words: (questions, answers), fuzzy.FuzzyIndex of strings of the table
+DictResource = namedtuple('DictResource', 'table index words')
+# table: union.RecordsUnion of the tables of resources
+# resources: tuple of DictResource of the merged dictionaries
+DictUnion = namedtuple('DictUnion', 'table resources')
+
+
+@mode
+class DictMode(Mode):
+    """Dictionary mode. 
+    
+    Required data format:
+    'q1, ... qn | comment = a1, ... am | comment'
+
+    A word is checked with all its translations in the resource
+    (in both directions, see multimap.py), 'tolerance' typos are
+    allowed (see fuzzy.py). A wrong answer which is a translation
+    of another word is shown in the results.
+    Several dictionaries can be merged (see union.py), a word is
+    checked with its translations in all of them.
+    Questions are chosen by the history of answers (see
+    history.py). Resources larger than STREAM_SIZE bytes (of text,
+    see archives.py) are not loaded, questions are sampled uniformly
+    from the text in one pass.
+    """
+
+    STREAM_SIZE = 64 * 1024 * 1024
+    index_version = 1  # version of the indexes of _build_resource
+    multi_resource = True
+
+    name = 'Словари'
+    info = 'Напишите перевод слова'
+    settings = {
+        'count': Setting(
+                    type='range',
+                    default=5,
+                    widget='range',
+                    from_=1,
+                    to=100,
+                    label='Количество слов',
+                 ),
+        'reverse': Setting(
+                       type='bool',
+                       default=False,
+                       widget='bool',
+                   ),
+        'tolerance': Setting(
+                         type='range',
+                         default=0,
+                         widget='range',
+                         from_=0,
+                         to=3,
+                         label='Допустимое число опечаток',
+                     ),
+    }
+
+    def get_state(self):
+        return {
+            'question': self.question,
+            'total': self.length,
+            'mistakes': len(self.report) - self.report.correct,
+        }
+
+    @staticmethod
+    def is_correct(answer_text, answers, tolerance=0):
+        if answer_text in answers:
+            return True
+        return bool(tolerance) and any(
+            is_close(answer_text, answer, tolerance) for answer in answers
+        )
+
+    @classmethod
+    def grader(cls, resource_name, settings=None):
+        from .. import compiled
+
+        settings = settings or cls.get_default_settings()
+        reverse = settings['reverse']
+        tolerance = settings.get('tolerance', 0)
+        file_path = os.path.join(cls.get_path(), resource_name)
+        table = compiled.load(file_path, cls._read_records, cls.records_version)
+        resource = cls._build_resource(table, file_path)
+        index = resource.index
+        ids = {table.string(i): i for i in range(table.strings_count)}
+
+        def grade(submission):
+            string_id = ids.get(submission['question'])
+            answers = () if string_id is None else tuple(
+                table.string(target) 
+                for target in index.targets(string_id, reverse)
+            )
+            if not answers:
+                raise ValueError('Unknown question')
+            answer_text = submission['answer']
+            correct = cls.is_correct(answer_text, answers, tolerance)
+            return {
+                'correct': correct,
+                'expected': answers,
+                'confused_with': () if correct else cls._find_confusions(
+                    (resource,), answer_text, (submission['question'],), 
+                    reverse, tolerance
+                ),
+            }
+        return grade
+
+    def on_answer(self, answer_text):
+        current_question = self.question
+        true_answer = self.answer
+        tolerance = self.settings.get('tolerance', 0)
+        correct = self.is_correct(answer_text, true_answer, tolerance)
+        confusions = ()
+        if not correct and self._resource is not None:
+            confusions = self._find_confusions(
+                self._parts(self._resource), answer_text, 
+                current_question,
+                self.settings['reverse'], tolerance
+            )
+        self.report.add(
+            current_question, answer_text, true_answer, correct, 
+            confused_with=confusions
+        )
+        self._report(self.key, answer_text, correct)
+        if self._history is not None:
+            self._history.record(self.key, self.index, correct)
+        try:
+            self._next_question()
+        except StopIteration:
+            if self._history is not None:
+                self._history.save()
+            header = 'Результаты:\n{} из {}\n\n'.format(
+                self.report.correct, 
+                self.length
+            )
+            self._on_exit(self.report.render(
+                self._format_mistake, 
+                self.report.mistakes(), 
+                header, 
+                separator=''
+            ))
+
+    def launch(self):
+        count = self.settings['count']
+        reverse = self.settings['reverse']
+        resource = self._resource
+        if resource is None:
+            records = reservoir_sample(
+                self._read_records(self._resource_path), 
+                count,
+                self.rng
+            )
+            indexes = [None] * len(records)
+            self._history = None
+        else:
+            table = resource.table
+            self._history = self._get_history('reverse' if reverse else '')
+            # weak questions are more probable
+            indexes = self._history.sample(
+                table, self._record_key, count, self.rng
+            )
+            # only the selected records are decoded
+            records = [table[i] for i in indexes]
+        # (index, key, question, answer)
+        questions = [
+            (i, self._record_key(record), *record[::-1 if reverse else 1])
+            for i, record in zip(indexes, records)
+        ]
+    
+        self.questions_i = iter(questions)
+        self.pattern = '{}\n\n>> {}'
+        self.length = len(records)
+        self.report = Report(('confused_with',))
+ 
+        try:
+            self._next_question()
+        except StopIteration:
+            self._on_exit('Нет доступных вопросов!')
+
+    def _next_question(self):
+        self.index, self.key, self.question, self.answer = next(
+            self.questions_i
+        )
+        # if there are several question options
+        shown = self.rng.choice(self.question)
+        if self._resource is not None:
+            self.answer = self._translations(shown) or self.answer
+        self.display = self.pattern.format(self.info, shown)
+
+    def _translations(self, word):
+        """ all translations of the shown word in the resources """
+        reverse = self.settings['reverse']
+        resources = self._parts(self._resource)
+        part, index = 0, self.index
+        if isinstance(self._resource, DictUnion):
+            part, index = self._resource.table.locate(index)
+
+        table, multimap, _ = resources[part]
+        record = table.record_ids(index)
+        translations = {}  # dict keeps the order
+        for string_id in record[1] if reverse else record[0]:
+            if table.string(string_id) == word:
+                translations.update(dict.fromkeys(
+                    table.string(target) 
+                    for target in multimap.targets(string_id, reverse)
+                ))
+                break
+        # the same (normalized) word in other dictionaries
+        for other, resource in enumerate(resources):
+            if other == part:
+                continue
+            table, multimap, words = resource
+            for _, string_ids in words[1 if reverse else 0].find(word):
+                for string_id in string_ids:
+                    translations.update(dict.fromkeys(
+                        table.string(target) 
+                        for target in multimap.targets(string_id, reverse)
+                    ))
+        return tuple(translations)
+
+    def _parse_resource(self, file_path):
+        if text_size(file_path) >= self.STREAM_SIZE:
+            # huge dictionary, it is sampled in launch()
+            return None
+        return self._build_resource(self._load_table(file_path), file_path)
+
+    @classmethod
+    def _build_resource(cls, table, file_path):
+        from .. import compiled
+
+        def build_index():
+            questions, answers = set(), set()
+            for i in range(len(table)):
+                question_ids, answer_ids = table.record_ids(i)
+                questions.update(question_ids)
+                answers.update(answer_ids)
+            arrays = build_links(table)
+            for prefix, ids in (
+                ('questions.', questions), ('answers.', answers)
+            ):
+                arrays.update(build_words(
+                    ((i, table.string(i)) for i in sorted(ids)), prefix
+                ))
+            return arrays
+
+        # the indexes are stored next to the compiled table
+        arrays = compiled.load_arrays(
+            file_path, table, 'dict', build_index, cls.index_version
+        )
+        words = (
+            FuzzyIndex(arrays, 'questions.'), FuzzyIndex(arrays, 'answers.')
+        )
+        return DictResource(table, BiMultimap(arrays), words)
+
+    def _merge_resources(self, file_paths, resources):
+        for file_path, resource in zip(file_paths, resources):
+            if resource is None:
+                raise ValueError('{} is too large to be merged'.format(
+                    os.path.basename(file_path)
+                ))
+        tables = [resource.table for resource in resources]
+        return DictUnion(
+            RecordsUnion(tables, map(key_hashes, file_paths, tables)),
+            tuple(resources)
+        )
+
+    @staticmethod
+    def _parts(resource):
+        """ returns DictResource of every merged dictionary """
+        if isinstance(resource, DictUnion):
+            return resource.resources
+        return (resource,)
+
+    @staticmethod
+    def _find_confusions(resources, answer_text, question, reverse, 
+                         tolerance=0, limit=3):
+        """ returns words (up to limit) whose translation is 
+        answer_text, except the words of question 
+        """
+        confusions = []
+        for table, index, words in resources:
+            found = words[0 if reverse else 1].find(answer_text, tolerance)
+            for _, string_ids in found:
+                for string_id in string_ids:
+                    for target in index.targets(string_id, not reverse):
+                        word = table.string(target)
+                        if word not in question and word not in confusions:
+                            confusions.append(word)
+                            if len(confusions) == limit:
+                                return tuple(confusions)
+        return tuple(confusions)
+
+    @staticmethod
+    def _format_mistake(item):
+        # ', '.join(...) because questions and answers - tuples
+        line = '{} - {} >> {}'.format(
+            ', '.join(item.question), 
+            item.answer, 
+            ', '.join(item.expected)
+        )
+        confusions = item.details['confused_with']
+        if confusions:
+            line += ' ({} - это {})'.format(item.answer, ', '.join(confusions))
+        return line + '\n'
+
+    @staticmethod
+    def _record_key(record):
+        # key of the history, the question in the direction of the file
+        return ', '.join(record[0])
+
+    @staticmethod
+    def _read_records(file_path):
+        with open_text(file_path) as file:
+            for string in file:
+                try:
+                    question, answer = string.replace('\n', '').split('=')
+                except Exception:
+                    continue
+                # remove additional info (comments)
+                question = question.split('|')[0]
+                answer = answer.split('|')[0]
+                # create a tuple of variables from string 
+                # like "alfa, beta, gamma"
+                q_tuple = tuple(
+                    map(str.strip, question.split(','))
+                )
+                a_tuple = tuple(
+                    map(str.strip, answer.split(','))
+                )
+                
+                if q_tuple and a_tuple:
+                    yield q_tuple, a_tuple
@@ -0,0 +1,214 @@
+""" Gallows mode """
+from collections import namedtuple
+
+from . import Mode, mode
+from ..archives import open_text
+from ..difficulty import DifficultyBuckets, build_arrays
+from ..setting import Setting
+from ..wordindex import LengthIndexes, bit_count
+
+
+# table: compiled.Table of words
+# index: wordindex.LengthIndexes of upper case words (built on hints)
+# buckets: difficulty.DifficultyBuckets of words
+GallowsResource = namedtuple('GallowsResource', 'table index buckets')
+
+
+@mode
+class GallowsMode(Mode):
+    """Gallows mode. Required data format:
+    word\nword ...\nword
+
+    Enter HINT to see the number of words matching the opened
+    letters and the most frequent unopened letter among them.
+    Words are picked by length and difficulty (see difficulty.py),
+    MAX_LENGTH includes longer words, difficulty 0 is any.
+    """
+
+    HINT = '?'
+    ALPHABET = 'АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ-'
+    MAX_LENGTH = 20
+    index_version = 1  # version of the buckets of _parse_resource
+    name = 'Виселица'
+    info = 'Угадайте слово, открывая буквы'
+
+    settings = {
+        'count': Setting(
+            type='range',
+            default=10,
+            widget='range',
+            from_=5,
+            to=20,
+            label='Количество попыток открыть букву',
+        ),
+        'min_length': Setting(
+            type='range',
+            default=2,
+            widget='range',
+            from_=2,
+            to=MAX_LENGTH,
+            label='Минимальная длина слова',
+        ),
+        'max_length': Setting(
+            type='range',
+            default=MAX_LENGTH,
+            widget='range',
+            from_=2,
+            to=MAX_LENGTH,
+            label='Максимальная длина слова',
+        ),
+        'difficulty': Setting(
+            type='range',
+            default=0,
+            widget='range',
+            from_=0,
+            to=3,
+            label='Сложность (0 - любая)',
+        ),
+    }
+
+    def get_state(self):
+        return {
+            'word': [
+                letter if letter in self._letters else None 
+                for letter in self._word
+            ],
+            'letters': sorted(self._letters),
+            'countdown': self._countdown,
+        }
+
+    def on_answer(self, answer_text):
+        answer_text = answer_text.upper()
+        error = ''
+        if answer_text == self.HINT:
+            error = self._hint()
+        elif len(answer_text) == 1:
+            if answer_text in self.ALPHABET:
+                if self._countdown != 0:
+                    self._report(
+                        self._word, 
+                        answer_text, 
+                        answer_text in self._word
+                    )
+                    self._letters.add(answer_text)
+                    self._countdown -= 1
+                    if self._is_word_open():
+                        self._finish()
+                        return
+                else:
+                    error = 'Необходимо ввести слово'
+        else:
+            self._report(self._word, answer_text, answer_text == self._word)
+            self._finish(answer_text)
+            return
+        message = 'Введите слово'
+        if self._countdown != 0:
+            message += ' или букву'
+        message += ':'
+        with self.display_batch():
+            self._print_word()
+            if error:
+                self.append_display('\n\n' + error)
+            self.append_display('\n\n' + message)
+            if self._countdown != 0:
+                self.append_display(
+                    '\n\nХодов осталось: ' + str(self._countdown)
+                )
+
+    def launch(self):
+        self._word = self._pick_word()
+        if self._word is None:
+            self._on_exit('Нет слов с такими настройками!')
+            return
+        self._countdown = self.settings['count']
+        self._letters = set()
+        with self.display_batch():
+            self._print_word()
+            self.append_display('\n\nВведите слово или букву:')
+
+    def _parse_resource(self, file_path):
+        from .. import compiled
+
+        table = self._load_table(file_path)
+        max_length = self.MAX_LENGTH
+
+        def build():
+            words = [word.upper() for (word,), in table]
+            return build_arrays(words, max_length)
+
+        def words_of(length):
+            # longer words share the bucket of max_length
+            for i in buckets.ids(length, length):
+                (word,), = table[i]
+                word = word.upper()
+                if len(word) == length:
+                    yield word
+
+        # the buckets are stored next to the compiled table
+        arrays = compiled.load_arrays(
+            file_path, 
+            table, 
+            'gallows', 
+            build, 
+            self.index_version
+        )
+        buckets = DifficultyBuckets(arrays)
+        return GallowsResource(table, LengthIndexes(words_of), buckets)
+
+    @staticmethod
+    def _read_records(file_path):
+        with open_text(file_path) as file:
+            for string in file:
+                word = string.strip()
+                if word:
+                    yield (word,),
+
+    def _pick_word(self):
+        # one random word of the buckets of the settings, 
+        # None if there are no such words
+        settings = self.settings
+        i = self._resource.buckets.pick(
+            self.rng,
+            settings.get('min_length', 0),
+            settings.get('max_length', self.MAX_LENGTH),
+            settings.get('difficulty', 0) or None
+        )
+        if i is None:
+            return None
+        (word,), = self._resource.table[i]
+        return word.upper()
+
+    def _hint(self):
+        pattern = [
+            letter if letter in self._letters else None 
+            for letter in self._word
+        ]
+        excluded = self._letters.difference(self._word)
+        index, bits = self._resource.index.filter(pattern, excluded)
+        frequency = index.letters_frequency(
+            bits, 
+            set(self.ALPHABET) - self._letters
+        )
+        message = 'Подходящих слов: {}'.format(bit_count(bits))
+        letter = max(frequency, key=frequency.get, default=None)
+        if letter and frequency[letter]:
+            message += ', чаще всего в них встречается буква ' + letter
+        return message
+
+    def _print_word(self):
+        self.display = ''.join(
+            ' ' + (letter if letter in self._letters else '_') + ' '
+            for letter in self._word
+        )
+
+    def _is_word_open(self):
+        for letter in self._word:
+            if letter not in self._letters:
+                return False
+        return True
+
+    def _finish(self, answer=None):
+        if not answer or answer == self._word:
+            self._on_exit('Вы угадали, это слово ' + self._word)
+        else:
+            self._on_exit('К сожалению Вы не угадали, это слово ' + self._word)
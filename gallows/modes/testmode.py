@@ -0,0 +1,290 @@
+""" Test mode """
+import os
+import re
+from array import array
+from collections import namedtuple
+from collections.abc import Sequence
+
+from . import Mode, mode
+from ..archives import open_text
+from ..report import Report
+from ..sampling import sample_excluding
+from ..setting import Setting
+from ..union import RecordsUnion, key_hashes
+
+
+# table: compiled.Table of records (union.RecordsUnion of merged tests)
+# pool: AnswersPool of distinct correct answers of all questions
+# (a tuple for merged tests)
+TestResource = namedtuple('TestResource', 'table pool')
+
+
+class AnswersPool(Sequence):
+    """Strings of a compiled table by their ids (array of ids),
+    only the drawn strings are decoded
+    """
+
+    def __init__(self, table, ids):
+        self._table = table
+        self._ids = ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, i):
+        return self._table.string(self._ids[i])
+
+
+@mode
+class TestMode(Mode):
+    """Test mode. Required data format:
+    question = correct_answer_1(ca1) | ca2 | ... ca3 ?
+    (optional) incorrect_answer_1(ia1) | ia2 | ... ia3
+    If no incorrect answers they are randomly selected from correct answers
+    to others questions (when the question is displayed)
+    Questions are chosen by the history of answers (see history.py)
+    Several tests can be merged, repeated questions (with the same
+    correct answers) are asked once (see union.py)
+    """
+
+    INCORRECT_ANSWERS_MIN = 2  # Minimum and ...
+    INCORRECT_ANSWERS_MAX = 5  # Maximum number of randomly selected incorrect answers (if needed)
+    name = 'Тесты'
+    records_version = 1
+    index_version = 1  # version of the pool index of _parse_resource
+    multi_resource = True
+    info = 'Выбирайте правильные ответы на вопросы из предложенного списка' \
+           '(необходимо вводить числа, соответсвующие правильным ответам,' \
+           'через пробел)'
+
+    settings = {
+        'count': Setting(
+            type='range',
+            default=5,
+            widget='range',
+            from_=4,
+            to=6,  # too short data file
+            label='Количество вопросов',
+        )
+    }
+
+    def get_state(self):
+        return {
+            'question': self._data[self._counter][0],
+            'options': self._cur_answer_list,
+            'number': self._counter + 1,
+            'total': len(self._data),
+        }
+
+    @staticmethod
+    def parse_answer(answer_text, options):
+        """ returns the options chosen by answer_text (indexes 
+        separated by spaces), raises ValueError if it is invalid 
+        """
+        chosen = []
+        answer_text = answer_text.strip()
+        if len(answer_text) == 0:
+            raise ValueError('Empty answer')
+        for index in re.split(r'\s+', answer_text):
+            index = int(index.strip())
+            if index < 1 or index > len(options):
+                raise ValueError('Invalid answer index {}'.format(index))
+            chosen.append(options[index - 1])
+        return chosen
+
+    @staticmethod
+    def compare(correct_answers, chosen):
+        """ returns (forgotten, excess) answers, in their order """
+        chosen_set = set(chosen)
+        correct_set = set(correct_answers)
+        forgotten = [
+            answer for answer in correct_answers if answer not in chosen_set
+        ]
+        excess = [
+            answer for answer in chosen if answer not in correct_set
+        ]
+        return forgotten, excess
+
+    @classmethod
+    def grader(cls, resource_name, settings=None):
+        from .. import compiled
+
+        table = compiled.load(
+            os.path.join(cls.get_path(), resource_name), 
+            cls._read_records, 
+            cls.records_version
+        )
+        questions = {question: cas for (question,), cas, _ in table}
+
+        def grade(submission):
+            cas = questions.get(submission['question'])
+            if cas is None:
+                raise ValueError('Unknown question')
+            options = submission['options']
+            if isinstance(options, str):
+                # like incorrect answers in resources
+                options = [option.strip() for option in options.split('|')]
+            chosen = cls.parse_answer(submission['answer'], options)
+            forgotten, excess = cls.compare(cas, chosen)
+            return {
+                'correct': not forgotten and not excess,
+                'forgotten': forgotten,
+                'excess': excess,
+            }
+        return grade
+
+    def on_answer(self, answer_text):
+        error = False
+
+        try:
+            cur_answers = self.parse_answer(
+                answer_text, 
+                self._cur_answer_list
+            )
+        except ValueError:
+            error = True
+        else:
+            row = self._data[self._counter]
+            forgotten, excess = self.compare(row[1], cur_answers)
+            correct = not forgotten and not excess
+            self.report.add(
+                row[0], answer_text.strip(), row[1], correct, 
+                chosen=cur_answers, forgotten=forgotten, excess=excess
+            )
+            self._report(row[0], answer_text.strip(), correct)
+            self._history.record(
+                row[0], 
+                self._indexes[self._counter], 
+                correct
+            )
+            self._counter += 1
+            if self._counter == len(self._data):
+                self._history.save()
+                self._display_result()
+                return
+  
+            self._cur_answer_list = self._prepare_question()
+  
+        with self.display_batch():
+            self._display_question()
+            if error:
+                self.append_display('\nНекорректный индекс ответа')
+
+    def launch(self):
+        count = self.settings['count']
+        table = self._resource.table
+        self._history = self._get_history()
+        # weak questions are more probable, the order is random
+        self._indexes = self._history.sample(
+            table, self._record_key, count, self.rng
+        )
+        self.rng.shuffle(self._indexes)
+        # [question, (correct answers), [incorrect answers]]
+        self._data = [
+            [question, cas, list(ias)]
+            for (question,), cas, ias in map(
+                table.__getitem__, 
+                self._indexes
+            )
+        ]
+        self._counter = 0
+        self.report = Report(('chosen', 'forgotten', 'excess'))
+        if not self._data:
+            self._on_exit('Нет доступных вопросов!')
+            return
+        self._cur_answer_list = self._prepare_question()
+        self._display_question()
+
+    def _parse_resource(self, file_path):
+        from .. import compiled
+
+        table = self._load_table(file_path)
+
+        def build():
+            # equal strings have one id, dict keeps the order of answers
+            ids = {}
+            for i in range(len(table)):
+                ids.update(dict.fromkeys(table.record_ids(i)[1]))
+            return {'pool': array('I', ids)}
+
+        # ids of the answers are stored next to the compiled table
+        arrays = compiled.load_arrays(
+            file_path, table, 'test', build, self.index_version
+        )
+        return TestResource(table, AnswersPool(table, arrays['pool']))
+
+    def _merge_resources(self, file_paths, resources):
+        tables = [resource.table for resource in resources]
+        pool = {}
+        for resource in resources:
+            pool.update(dict.fromkeys(resource.pool))
+        return TestResource(
+            RecordsUnion(tables, map(key_hashes, file_paths, tables)),
+            tuple(pool)
+        )
+
+    @staticmethod
+    def _record_key(record):
+        return record[0][0]
+
+    @staticmethod
+    def _read_records(file_path):
+        with open_text(file_path) as file:
+            for string in file:
+                try:
+                    question, answers = string.strip().split('=')
+                except ValueError:
+                    continue
+                answers = answers.split('?')
+                cas = tuple(ans.strip() for ans in answers[0].split('|'))
+                ias = ()
+                if len(answers) > 1:
+                    ias = tuple(ans.strip() for ans in answers[1].split('|'))
+                yield (question.strip(),), cas, ias
+
+    def _fill_incorrect_answers(self, row):
+        resource = self._resource
+        limit = self.rng.randint(self.INCORRECT_ANSWERS_MIN,
+                                 self.INCORRECT_ANSWERS_MAX)
+        # correct answers of every question are in the pool
+        excluded = frozenset(row[1])
+        row[2].extend(
+            sample_excluding(resource.pool, limit, excluded, self.rng)
+        )
+
+    def _prepare_question(self):
+        cur_row = self._data[self._counter]
+        if not len(cur_row[2]):  # If no incorrect answers
+            self._fill_incorrect_answers(cur_row)
+        cur_answers = list(cur_row[1]) + list(cur_row[2])
+        self.rng.shuffle(cur_answers)
+        return cur_answers
+
+    def _display_question(self):
+        cur_row = self._data[self._counter]
+        lines = [cur_row[0]]
+        for i, answer in enumerate(self._cur_answer_list, 1):
+            lines.append('{}. {}'.format(i, answer))
+        self.display = '\n'.join(lines)
+
+    def _display_result(self):
+        self._on_exit(self.report.render(
+            self._format_item, 
+            header='Результаты:\n\n', 
+            separator='\n\n'
+        ))
+
+    @staticmethod
+    def _format_item(item):
+        details = item.details
+        lines = [
+            item.question, 
+            'Указанные ответы: ' + ', '.join(details['chosen'])
+        ]
+        if item.correct:
+            lines.append('Все верно!')
+        if details['forgotten']:
+            lines.append('Забытые ответы: ' + ', '.join(details['forgotten']))
+        if details['excess']:
+            lines.append('Лишние ответы: ' + ', '.join(details['excess']))
+        return '\n'.join(lines)
@@ -0,0 +1,82 @@
+"""Bidirectional multimap of the strings of a compiled table
+
+Every record (left group, right group) of the table links all its
+left strings with all its right strings. Links are stored once for
+both directions as sorted arrays of string ids (CSR):
+    offsets[id] .. offsets[id + 1] : range of targets of string id
+so a word shared by several records keeps all its translations
+(synonyms) in both directions, and strings are the interned ids of
+the table (compiled.Table.string decodes them).
+
+The arrays are built by build_arrays(), they can be stored in an
+index sidecar (compiled.load_arrays) and mapped again.
+"""
+from array import array
+
+
+ARRAYS = ('forward_offsets', 'forward_targets',
+          'backward_offsets', 'backward_targets')
+
+
+def build_arrays(table, left=0, right=1, prefix=''):
+    """ returns 'name': array('I') of the multimap of table """
+    size = table.strings_count
+    links = set()
+    for i in range(len(table)):
+        groups = table.record_ids(i)
+        for left_id in groups[left]:
+            for right_id in groups[right]:
+                links.add((left_id, right_id))
+
+    arrays = {}
+    for direction, pairs in (
+        ('forward', sorted(links)),
+        ('backward', sorted((right_id, left_id)
+                            for left_id, right_id in links)),
+    ):
+        offsets, targets = _pack(pairs, size)
+        arrays[prefix + direction + '_offsets'] = offsets
+        arrays[prefix + direction + '_targets'] = targets
+    return arrays
+
+
+def _pack(links, size):
+    offsets = array('I', [0]) * (size + 1)
+    targets = array('I', [target for _, target in links])
+    for source, _ in links:
+        offsets[source + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+    return offsets, targets
+
+
+class BiMultimap:
+    """Multimap between the strings of fields left and right of table
+
+    - targets(string_id, reverse=False) -> sequence of int
+      : ids of strings linked with string_id, right ones
+        for a left string, left ones if reverse
+    - links: int : number of distinct links
+
+    arrays are the arrays of build_arrays() (array.array or mapped
+    memoryview) with the names prefix + ARRAYS.
+    """
+
+    def __init__(self, arrays, prefix=''):
+        forward_offsets, forward_targets, backward_offsets, \
+            backward_targets = (arrays[prefix + name] for name in ARRAYS)
+        self._forward = (forward_offsets, forward_targets)
+        self._backward = (backward_offsets, backward_targets)
+        self.links = len(forward_targets)
+
+    def __sizeof__(self):
+        # mapped arrays are not in the memory of the process
+        size = object.__sizeof__(self)
+        for items in self._forward + self._backward:
+            if isinstance(items, array):
+                size += items.itemsize * len(items)
+        return size
+
+    def targets(self, string_id, reverse=False):
+        offsets, targets = self._backward if reverse else self._forward
+        return targets[offsets[string_id]:offsets[string_id + 1]]
@@ -0,0 +1,134 @@
+"""Registry of modes
+
+Modes are described by ModeSpec (name, info and the import target of
+the class), the module of a mode is imported only when it is loaded.
+Sources of specs:
+- BUILTIN : built-in modes (gallows.modes.*)
+- entry points of the group 'gallows.modes' : third-party modes,
+  'mode name = package.module:ModeClass', imported on demand
+- entry points of the group 'gallows.mode_specs' : ModeSpec objects
+  of third-party modes (their modules are imported at startup, so
+  they must be light)
+- modes.modes : classes decorated by @mode which are already imported
+"""
+import importlib
+
+from .modes import modes as imported_modes
+
+
+MODES_GROUP = 'gallows.modes'
+SPECS_GROUP = 'gallows.mode_specs'
+
+
+class ModeSpec:
+    """Lightweight description of a mode
+
+    - name: str    : mode name in UI
+    - info: str    : mode description (None if unknown before load)
+    - target: str  : 'package.module:ModeClass'
+    - load() -> Mode subclass
+      : imports the module of the mode (once)
+    """
+
+    def __init__(self, name, info=None, target=None, mode_cls=None):
+        self.name = name
+        self.info = info
+        self.target = target
+        self._mode_cls = mode_cls
+
+    def __repr__(self):
+        return '{}({!r}, target={!r})'.format(
+            type(self).__name__, self.name, self.target
+        )
+
+    @property
+    def is_loaded(self):
+        return self._mode_cls is not None
+
+    def load(self):
+        if self._mode_cls is None:
+            module_name, _, class_name = self.target.partition(':')
+            module = importlib.import_module(module_name)
+            mode_cls = getattr(module, class_name)
+            if self.info is None:
+                self.info = mode_cls.info
+            self._mode_cls = mode_cls
+        return self._mode_cls
+
+    @classmethod
+    def from_class(cls, mode_cls):
+        return cls(
+            mode_cls.get_name(),
+            mode_cls.info,
+            '{}:{}'.format(mode_cls.__module__, mode_cls.__qualname__),
+            mode_cls,
+        )
+
+
+BUILTIN = (
+    ModeSpec(
+        'Словари',
+        'Напишите перевод слова',
+        'gallows.modes.dictmode:DictMode',
+    ),
+    ModeSpec(
+        'Тесты',
+        'Выбирайте правильные ответы на вопросы из предложенного списка'
+        '(необходимо вводить числа, соответсвующие правильным ответам,'
+        'через пробел)',
+        'gallows.modes.testmode:TestMode',
+    ),
+    ModeSpec(
+        'Виселица',
+        'Угадайте слово, открывая буквы',
+        'gallows.modes.gallowsmode:GallowsMode',
+    ),
+)
+
+
+def _entry_points(group):
+    # importlib.metadata is slow to import, it is needed only here
+    from importlib import metadata
+    try:
+        return metadata.entry_points(group=group)
+    except TypeError:  # python < 3.10
+        return metadata.entry_points().get(group, ())
+
+
+def _load_specs():
+    specs = {spec.name: spec for spec in BUILTIN}
+    for point in _entry_points(SPECS_GROUP):
+        spec = point.load()
+        specs.setdefault(spec.name, spec)
+    for point in _entry_points(MODES_GROUP):
+        specs.setdefault(point.name, ModeSpec(point.name, target=point.value))
+    return specs
+
+
+_specs = None
+
+
+def get_specs(entry_points=True):
+    """Returns dict 'name': ModeSpec of all available modes
+
+    With entry_points=False only built-in and imported modes are
+    returned: scanning of installed packages is slow, the GUI does it
+    after the window is shown.
+    """
+    global _specs
+    if not entry_points:
+        specs = {spec.name: spec for spec in BUILTIN}
+        specs.update(_specs or {})
+    else:
+        if _specs is None:
+            _specs = _load_specs()
+        specs = _specs
+    for mode_cls in imported_modes:
+        if mode_cls.get_name() not in specs:
+            specs[mode_cls.get_name()] = ModeSpec.from_class(mode_cls)
+    return dict(specs)
+
+
+def get_mode(name):
+    """ returns the class of the mode name (imports it) """
+    return get_specs()[name].load()
@@ -0,0 +1,131 @@
+"""Record and replay of sessions
+
+A recording (Session.recording()) is a dict:
+    {mode, resource, seed, settings, history, answers, result}
+Recordings are stored as JSON lines. A session recorded without the
+history of answers (history=False) is reproduced exactly: the same
+questions, the same frames and the same result. With the history the
+choice of questions depends on the answers of earlier sessions, such
+recordings are replayed with the history disabled and are reported
+as unchecked.
+
+Finished sessions are recorded to the file GALLOWS_RECORD (or
+'python -m gallows --record FILE'), the GUI and the server run
+sessions without the history while recording. Replay them by
+    python -m gallows replay FILE [--check]
+"""
+import json
+import os
+import sys
+import threading
+
+
+_record_path = os.environ.get('GALLOWS_RECORD')
+_record_lock = threading.Lock()
+
+
+def enable_recording(path):
+    """ finished sessions will be appended to the file path """
+    global _record_path
+    _record_path = path
+
+
+def is_recording():
+    """ True if finished sessions are recorded """
+    return _record_path is not None
+
+
+def record(session):
+    """ appends the recording of session if recording is enabled """
+    if _record_path is None:
+        return
+    line = json.dumps(session.recording(), ensure_ascii=False) + '\n'
+    with _record_lock:
+        try:
+            with open(_record_path, 'at', encoding='utf8') as file:
+                file.write(line)
+        except OSError:
+            # the task must not fail because of the recording
+            pass
+
+
+def write_recordings(file, sessions):
+    """ writes recordings of sessions to the text file """
+    for session in sessions:
+        file.write(json.dumps(session.recording(), ensure_ascii=False))
+        file.write('\n')
+
+
+def read_recordings(path):
+    """ yields recordings of the JSON lines file path """
+    with open(path, 'rt', encoding='utf8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def replay(recording, event_log=None, on_frame=None):
+    """Returns the finished (if the answers finish it) Session of
+    recording, on_frame(frame) is called for every frame
+    """
+    from .registry import get_mode
+    from .session import Session
+
+    session = Session(
+        get_mode(recording['mode']),
+        recording['resource'],
+        recording['settings'],
+        event_log=event_log,
+        seed=recording['seed'],
+        history=False,
+    )
+    frame = session.start()
+    if on_frame is not None:
+        on_frame(frame)
+    for answer_text in recording['answers']:
+        if session.finished:
+            break
+        frame = session.answer(answer_text)
+        if on_frame is not None:
+            on_frame(frame)
+    return session
+
+
+def matches(recording, session):
+    """ True if session has the recorded result, None if it can't be
+    checked (recorded with the history or unfinished)
+    """
+    if recording.get('history', False) or recording.get('result') is None:
+        return None
+    return session.result == recording['result']
+
+
+def main(args):
+    """ 'python -m gallows replay' command """
+    sessions = mismatched = unchecked = 0
+    try:
+        for recording in read_recordings(args.recordings):
+            session = replay(recording)
+            sessions += 1
+            matched = matches(recording, session) if args.check else True
+            if matched is None:
+                unchecked += 1
+            elif not matched:
+                mismatched += 1
+                print(
+                    'Session {} ({}/{}, seed {}) differs'.format(
+                        sessions, recording['mode'],
+                        recording['resource'], recording['seed']
+                    ),
+                    file=sys.stderr
+                )
+            elif not args.check:
+                print(session.frame().text, end='\n\n')
+    except (OSError, ValueError, KeyError) as error:
+        sys.exit('Invalid recordings: {}'.format(error))
+    if args.check:
+        print('{} sessions, {} differ, {} unchecked'.format(
+            sessions, mismatched, unchecked
+        ))
+        if mismatched:
+            sys.exit(1)
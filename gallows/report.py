@@ -0,0 +1,144 @@
+"""Results of a task
+
+A mode fills the Report of a session as answers arrive, the result
+text is rendered once (str.join of formatted items) and the items
+can be exported as a stream of JSON lines or CSV rows, without
+building the whole text.
+
+Row fields: question, answer, expected, correct and the details of
+the report (mode specific, e.g. 'forgotten'), lists are JSON arrays
+or ' | ' separated strings in CSV (like in resources).
+
+Reports of finished sessions are exported to a directory by
+'python -m gallows --report DIR [--report-format csv]' (see
+enable_export), a file per session:
+    <time>-<mode class>-<seed>.jsonl (or .csv)
+"""
+import csv
+import json
+import os
+import time
+from collections import namedtuple
+
+
+# - question: str or tuple of str
+# - answer: str         : the answer as it was typed
+# - expected: tuple     : correct answers
+# - correct: bool
+# - details: dict       : the details of the report
+ReportItem = namedtuple('ReportItem', 'question answer expected correct details')
+
+LIST_SEPARATOR = ' | '
+FORMATS = ('jsonl', 'csv')
+
+_export = None  # (directory, format) of the export
+
+
+class Report:
+    """Answers of a session
+
+    - add(question, answer, expected, correct, **details) -> None
+    - mistakes() -> Iterator[ReportItem]
+    - render(format_item, items=None, header='', separator='\\n') -> str
+      : header and the formatted items (all by default)
+    - rows() -> Iterator[dict]  : items as export rows
+    - write(file, format_='jsonl') -> int
+      : writes rows to the text file (format_ is 'jsonl' or
+        'csv'), returns the number of rows
+    - correct: int   : number of correct answers
+    - fields: tuple  : names of the row fields
+
+    details are the names of the details of items.
+    """
+
+    def __init__(self, details=()):
+        self.fields = ('question', 'answer', 'expected', 'correct', *details)
+        self.items = []
+        self.correct = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, question, answer, expected, correct, **details):
+        self.items.append(
+            ReportItem(question, answer, tuple(expected), correct, details)
+        )
+        if correct:
+            self.correct += 1
+
+    def mistakes(self):
+        return (item for item in self.items if not item.correct)
+
+    def render(self, format_item, items=None, header='', separator='\n'):
+        if items is None:
+            items = self.items
+        return header + separator.join(map(format_item, items))
+
+    def rows(self):
+        for item in self.items:
+            row = {
+                'question': item.question,
+                'answer': item.answer,
+                'expected': item.expected,
+                'correct': item.correct,
+            }
+            row.update(item.details)
+            yield row
+
+    def write(self, file, format_='jsonl'):
+        count = 0
+        if format_ == 'csv':
+            writer = csv.DictWriter(file, self.fields)
+            writer.writeheader()
+            for row in self.rows():
+                writer.writerow({
+                    key: LIST_SEPARATOR.join(value)
+                        if isinstance(value, (list, tuple)) else value
+                    for key, value in row.items()
+                })
+                count += 1
+        elif format_ == 'jsonl':
+            for row in self.rows():
+                file.write(json.dumps(row, ensure_ascii=False))
+                file.write('\n')
+                count += 1
+        else:
+            raise ValueError('Unknown format {}'.format(format_))
+        return count
+
+
+def enable_export(directory, format_='jsonl'):
+    """ reports of finished sessions will be written to files of
+    directory, format_ is 'jsonl' or 'csv'
+    """
+    global _export
+    if format_ not in FORMATS:
+        raise ValueError('Unknown format {}'.format(format_))
+    _export = (directory, format_)
+
+
+def export(session):
+    """ writes the report of the finished session if the export is
+    enabled, returns the path of the file or None
+    """
+    if _export is None or session.report is None:
+        return None
+    directory, format_ = _export
+    name = '{}-{}-{}.{}'.format(
+        time.strftime('%Y%m%d%H%M%S'),
+        session.mode.__name__,
+        session.seed,
+        format_
+    )
+    path = os.path.join(directory, name)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'wt', encoding='utf8', newline='') as file:
+            session.report.write(file, format_)
+    except OSError:
+        # the task must not fail because of the export
+        return None
+    return path
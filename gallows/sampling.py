@@ -0,0 +1,138 @@
+"""Random sampling helpers for modes"""
+import random
+from array import array
+
+
+def reservoir_sample(iterable, k, rng=random):
+    """Returns k random items of iterable in one pass
+
+    Memory is O(k), all items are equiprobable (Algorithm R),
+    as with random.sample over the whole sequence. The order
+    of the result is random.
+    """
+    reservoir = []
+    for i, item in enumerate(iterable):
+        if i < k:
+            reservoir.append(item)
+        else:
+            j = rng.randrange(i + 1)
+            if j < k:
+                reservoir[j] = item
+    rng.shuffle(reservoir)
+    return reservoir
+
+
+def sample_excluding(population, k, excluded, rng=random):
+    """Returns up to k random items of population not in excluded
+
+    population is a sequence of distinct items, excluded is a set
+    of items of population. Sampling is without replacement and
+    takes O(k + len(excluded)) time.
+    """
+    draw = min(len(population), k + len(excluded))
+    candidates = rng.sample(population, draw)
+    return [item for item in candidates if item not in excluded][:k]
+
+
+class WeightedSampler:
+    """Weighted random choice of indexes 0..n-1 (Fenwick tree)
+
+    - sample(rng=random) -> int
+      : random index, probability is proportional to its weight
+    - sample_distinct(k, rng=random) -> List[int]
+      : up to k distinct indexes with positive weights
+    - update(i, weight) -> None
+    - weights: array('d')
+    - total: float : sum of the weights
+    - positive: int : number of positive weights
+
+    Sampling and updates take O(log n), the tree is built in O(n).
+    """
+
+    def __init__(self, weights):
+        self.weights = array('d', weights)
+        size = len(self.weights)
+        tree = array('d', [0.0]) * (size + 1)
+        for i, weight in enumerate(self.weights, 1):
+            tree[i] += weight
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._size = size
+        self.positive = sum(1 for weight in self.weights if weight > 0)
+        self._step = 1 << size.bit_length() >> 1 if size else 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def total(self):
+        tree = self._tree
+        i = self._size
+        total = 0.0
+        while i:
+            total += tree[i]
+            i &= i - 1
+        return total
+
+    def update(self, i, weight):
+        if weight < 0:
+            raise ValueError('Weight must be non-negative')
+        previous = self.weights[i]
+        self.positive += (weight > 0) - (previous > 0)
+        delta = weight - previous
+        self.weights[i] = weight
+        tree = self._tree
+        i += 1
+        while i <= self._size:
+            tree[i] += delta
+            i += i & -i
+
+    def sample(self, rng=random):
+        if not self.positive:
+            raise ValueError('All weights are zero')
+        return self._choose(rng)
+
+    def sample_distinct(self, k, rng=random):
+        # chosen indexes are zeroed while drawing, then restored
+        chosen = []
+        try:
+            # the float total is not reliable here: zeroed weights can
+            # leave rounding errors in the tree
+            while len(chosen) < k and self.positive:
+                i = self._choose(rng)
+                chosen.append((i, self.weights[i]))
+                self.update(i, 0.0)
+        finally:
+            for i, weight in chosen:
+                self.update(i, weight)
+        return [i for i, _ in chosen]
+
+    def _choose(self, rng):
+        # an index with a positive weight
+        i = self._find(rng.random() * self.total)
+        if self.weights[i] > 0:
+            return i
+        # rounding errors of the tree (rare), O(n) draw by the weights
+        value = rng.random() * sum(self.weights)
+        for i, weight in enumerate(self.weights):
+            if weight > 0:
+                last = i
+                value -= weight
+                if value < 0:
+                    break
+        return last
+
+    def _find(self, value):
+        # the first index whose prefix sum exceeds value
+        tree = self._tree
+        position = 0
+        step = self._step
+        while step:
+            next_ = position + step
+            if next_ <= self._size and tree[next_] <= value:
+                position = next_
+                value -= tree[next_]
+            step >>= 1
+        return min(position, self._size - 1)
@@ -0,0 +1,394 @@
+"""Local multi-session HTTP server
+
+All sessions live in one asyncio event loop and share the parsed
+resources through cache.resource_cache (read-only), so a session
+only keeps its own progress. The server works offline, run it by
+'python -m gallows serve' and open http://127.0.0.1:8080/
+
+JSON API:
+- GET /modes                 : modes, their resources (names and
+                               catalog.ResourceInfo) and settings
+- POST /sessions             : {mode, resource, settings, user}
+                               -> {id, frame}
+                               (resource names of multi_resource modes
+                               can be joined by RESOURCES_SEPARATOR,
+                               user is the id of the client for its
+                               history of answers, without it or if
+                               sessions are recorded the history is
+                               not used)
+- POST /sessions/<id>        : {answer} -> {id, frame}
+- DELETE /sessions/<id>      : closes the session
+"""
+import asyncio
+import json
+import time
+import traceback
+import uuid
+from http import HTTPStatus
+
+from . import replay
+from .history import is_valid_user
+from .modes import RESOURCES_SEPARATOR
+from .registry import get_specs
+from .session import Session
+
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Gallows Game</title></head>
+<body style="font-family: sans-serif; max-width: 40em">
+<select id="mode"></select> <select id="resource"></select>
+<button id="run">Run</button>
+<pre id="display" style="background: #eee; padding: 5px; min-height: 10em;
+ white-space: pre-wrap"></pre>
+<form id="form"><input id="input" maxlength="50" autocomplete="off">
+<button>Send</button></form>
+<script>
+let modes = [], session = null;
+const SEPARATOR = %SEPARATOR%;
+const $ = (id) => document.getElementById(id);
+let user = localStorage.getItem('gallows-user');
+if (!user) {
+  user = Array.from(crypto.getRandomValues(new Uint8Array(16)),
+    (b) => b.toString(16).padStart(2, '0')).join('');
+  localStorage.setItem('gallows-user', user);
+}
+async function call(method, url, body) {
+  const response = await fetch(url, {method: method,
+    body: body ? JSON.stringify(body) : undefined});
+  const data = await response.json();
+  if (!response.ok) throw new Error(data.error);
+  return data;
+}
+function show(data) {
+  session = data.frame.finished ? null : data.id;
+  $('display').textContent = data.frame.text;
+}
+function fillResources() {
+  const mode = modes.find((m) => m.name === $('mode').value);
+  $('resource').innerHTML = '';
+  $('resource').multiple = mode.multi_resource;
+  mode.resources_info.forEach((r) => $('resource').add(new Option(
+    r.name + ' (' + (r.compiled ? r.entries + ' records, ' : '')
+      + (r.size / 1024).toFixed(1) + ' KB)', r.name)));
+}
+$('mode').onchange = fillResources;
+$('run').onclick = () => call('POST', '/sessions',
+  {mode: $('mode').value, resource: Array.from($('resource').selectedOptions,
+    (option) => option.value).join(SEPARATOR), user: user})
+  .then(show, (e) => $('display').textContent = e.message);
+$('form').onsubmit = (event) => {
+  event.preventDefault();
+  const answer = $('input').value;
+  $('input').value = '';
+  if (session && answer)
+    call('POST', '/sessions/' + session, {answer: answer})
+      .then(show, (e) => $('display').textContent = e.message);
+};
+call('GET', '/modes').then((data) => {
+  modes = data;
+  modes.forEach((m) => $('mode').add(new Option(m.name, m.name)));
+  fillResources();
+});
+</script></body></html>
+""".replace('%SEPARATOR%', json.dumps(RESOURCES_SEPARATOR))
+
+
+# types of the values of settings by Setting.type
+SETTING_TYPES = {'range': int, 'bool': bool}
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status, message=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+class GallowsServer:
+    """Hosts many concurrent sessions in one event loop
+
+    - serve_forever() -> None : coroutine, runs the server
+    - sessions: dict          
+      : 'id': [Session, last access time, asyncio.Lock]
+
+    Sessions without answers for 'session_timeout' seconds
+    are closed. Tasks run in the executor (parsing, reading
+    and saving histories must not block the loop), answers
+    of one session are handled one at a time.
+    """
+
+    max_body = 64 * 1024
+    session_timeout = 30 * 60
+
+    def __init__(self, host='127.0.0.1', port=8080):
+        self.host = host
+        self.port = port
+        self.modes = get_specs()
+        self.sessions = {}
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        cleaner = asyncio.ensure_future(self._expire_sessions())
+        print('Serving on http://{}:{}/'.format(self.host, self.port))
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            cleaner.cancel()
+
+    async def _expire_sessions(self):
+        while True:
+            await asyncio.sleep(60)
+            deadline = time.monotonic() - self.session_timeout
+            expired = [
+                id_ for id_, entry in self.sessions.items()
+                    if entry[1] < deadline
+            ]
+            for id_ in expired:
+                del self.sessions[id_]
+
+    ####### HTTP ########
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                try:
+                    status, content_type, payload = await self._dispatch(
+                        method, path, body
+                    )
+                except HTTPError as error:
+                    status, content_type, payload = self._error(
+                        error.status, str(error)
+                    )
+                except ValueError as error:
+                    # e.g. resources which can't be merged
+                    status, content_type, payload = self._error(
+                        HTTPStatus.BAD_REQUEST, str(error)
+                    )
+                except Exception:
+                    traceback.print_exc()
+                    status, content_type, payload = self._error(
+                        HTTPStatus.INTERNAL_SERVER_ERROR
+                    )
+                keep_alive = headers.get('connection', '') != 'close'
+                self._write_response(
+                    writer, status, content_type, payload, keep_alive
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ValueError as error:
+            # malformed request, the connection is not reused
+            self._write_response(
+                writer, *self._error(HTTPStatus.BAD_REQUEST, str(error)),
+                False
+            )
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        request_line = line.decode('latin-1').split(' ', 2)
+        if len(request_line) != 3:
+            raise ValueError('Malformed request line')
+        method, path, _ = request_line
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        if length > self.max_body:
+            raise ValueError('Request body is too large')
+        body = await reader.readexactly(length) if length else b''
+        return method, path, headers, body
+
+    @staticmethod
+    def _write_response(writer, status, content_type, payload, keep_alive):
+        data = payload.encode('utf-8')
+        head = (
+            'HTTP/1.1 {} {}\r\n'
+            'Content-Type: {}; charset=utf-8\r\n'
+            'Content-Length: {}\r\n'
+            'Connection: {}\r\n\r\n'
+        ).format(
+            status.value,
+            status.phrase,
+            content_type,
+            len(data),
+            'keep-alive' if keep_alive else 'close',
+        )
+        writer.write(head.encode('latin-1') + data)
+
+    async def _dispatch(self, method, path, body):
+        parts = [part for part in path.split('?')[0].split('/') if part]
+
+        if method == 'GET' and not parts:
+            return HTTPStatus.OK, 'text/html', PAGE
+        if method == 'GET' and parts == ['modes']:
+            return self._json(self._list_modes())
+        if parts[:1] == ['sessions'] and len(parts) <= 2:
+            data = self._parse_json(body)
+            if method == 'POST' and len(parts) == 1:
+                return self._json(await self._create_session(data))
+            if len(parts) == 2:
+                if method == 'POST':
+                    return self._json(await self._answer(parts[1], data))
+                if method == 'DELETE':
+                    self._get_session(parts[1])
+                    del self.sessions[parts[1]]
+                    return self._json({'id': parts[1]})
+        raise HTTPError(HTTPStatus.NOT_FOUND)
+
+    @staticmethod
+    def _json(data):
+        return HTTPStatus.OK, 'application/json', json.dumps(
+            data, ensure_ascii=False
+        )
+
+    @staticmethod
+    def _error(status, message=None):
+        return status, 'application/json', json.dumps(
+            {'error': message or status.phrase}, ensure_ascii=False
+        )
+
+    @staticmethod
+    def _parse_json(body):
+        if not body:
+            return {}
+        try:
+            data = json.loads(body.decode('utf-8'))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Invalid JSON')
+        if not isinstance(data, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Object expected')
+        return data
+
+    ####### Actions ########
+    def _list_modes(self):
+        result = []
+        for name, spec in self.modes.items():
+            mode_cls = spec.load()
+            catalog = mode_cls.get_catalog()
+            names = catalog.names()
+            infos = []
+            for resource_name in names:
+                try:
+                    infos.append(catalog.info(resource_name)._asdict())
+                except (KeyError, OSError):
+                    # removed after the scan
+                    pass
+            result.append({
+                'name': name,
+                'info': mode_cls.info,
+                'resources': names,
+                'resources_info': infos,
+                'settings': mode_cls.get_default_settings(),
+                'multi_resource': mode_cls.multi_resource,
+            })
+        return result
+
+    async def _create_session(self, data):
+        spec = self.modes.get(data.get('mode'))
+        if spec is None:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Unknown mode')
+        mode_cls = spec.load()
+        resource_name = data.get('resource')
+        if not (
+            isinstance(resource_name, str) 
+            and mode_cls.has_resource(resource_name)
+        ):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Unknown resource')
+        settings = data.get('settings') or {}
+        if not isinstance(settings, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Invalid settings')
+        settings = self._make_settings(mode_cls, settings)
+        user = data.get('user')
+        if user is not None and not is_valid_user(user):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Invalid user')
+
+        history = user
+        if user is None or replay.is_recording():
+            # recordings are checked without the history
+            history = False
+
+        def start():
+            session = Session(
+                mode_cls, resource_name, settings, history=history
+            )
+            return session, session.start()
+
+        loop = asyncio.get_running_loop()
+        session, frame = await loop.run_in_executor(None, start)
+        id_ = uuid.uuid4().hex
+        if not frame.finished:
+            self.sessions[id_] = [session, time.monotonic(), asyncio.Lock()]
+        return {'id': id_, 'frame': frame._asdict()}
+
+    async def _answer(self, id_, data):
+        answer = data.get('answer')
+        if not isinstance(answer, str) or not answer:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Answer expected')
+        session, _, lock = self._get_entry(id_)
+        async with lock:
+            if session.finished:
+                raise HTTPError(HTTPStatus.NOT_FOUND, 'Unknown session')
+            # the last answer saves the history
+            loop = asyncio.get_running_loop()
+            frame = await loop.run_in_executor(None, session.answer, answer)
+        if frame.finished:
+            self.sessions.pop(id_, None)
+        elif id_ in self.sessions:
+            self.sessions[id_][1] = time.monotonic()
+        return {'id': id_, 'frame': frame._asdict()}
+
+    def _get_session(self, id_):
+        return self._get_entry(id_)[0]
+
+    def _get_entry(self, id_):
+        try:
+            return self.sessions[id_]
+        except KeyError:
+            raise HTTPError(HTTPStatus.NOT_FOUND, 'Unknown session')
+
+    @staticmethod
+    def _make_settings(mode_cls, values):
+        settings = mode_cls.get_default_settings()
+        declared = getattr(mode_cls, 'settings', None) or {}
+        for key, value in values.items():
+            setting = declared.get(key)
+            # JSON 5.0 and true pass 'in range', the exact type is checked
+            expected = SETTING_TYPES.get(getattr(setting, 'type', None))
+            if (
+                setting is None
+                or expected is not None and type(value) is not expected
+                or not setting.is_valid(value)
+            ):
+                raise HTTPError(
+                    HTTPStatus.BAD_REQUEST,
+                    'Invalid setting "{}"'.format(key)
+                )
+            settings[key] = value
+        return settings
+
+
+def serve(host='127.0.0.1', port=8080):
+    try:
+        asyncio.run(GallowsServer(host, port).serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,181 @@
+"""UI-agnostic tasks of modes
+
+Session runs a mode without any GUI (and without tkinter):
+answers go in, frames (text plus structured state) come out.
+The GUI (gg.GallowsGame) renders frames into View, other front
+ends can use them the same way.
+"""
+import os
+import random
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from . import metrics, replay
+
+
+# - text: str      : text of the screen
+# - state: dict    : mode, finished flag and Mode.get_state() items
+# - finished: bool : True if the task is over, text is the result
+Frame = namedtuple('Frame', 'text state finished')
+
+
+class Screen:
+    """ headless display, modes write their text here """
+
+    __slots__ = ('display',)
+
+    def __init__(self):
+        self.display = ''
+
+    def append(self, text):
+        self.display += text
+
+    @contextmanager
+    def batch(self):
+        yield
+
+
+class Session:
+    """Task of a mode with its own headless screen
+
+    - start() -> Frame
+      : launches the task, returns the first frame
+    - answer(answer_text) -> Frame
+      : handles user input, returns the next frame
+    - frame() -> Frame
+      : returns the current frame
+    - finished: bool
+    - result: str   : result text (after the finish)
+    - report: report.Report or None
+      : answers of the task (if the mode fills it), 
+      exported at the finish (see report.enable_export)
+    - recording() -> dict
+      : mode, resource, seed, settings, history, answers 
+      and result of the session (see replay.py)
+
+    The constructor parses the resource (see Mode), it can be
+    called in a worker thread.
+    Answers are written to event_log (events.EventLog, the shared
+    one by default), event_log=None disables it.
+    launch, on_answer and on_exit of the mode are timing spans
+    (see metrics.py).
+    The task uses its own random generator seeded by seed (a random
+    one by default), history=False makes the task independent of the
+    history of answers, so the same seed, settings and answers give
+    the same session. history can be the id of a user (the server),
+    then the history of the user is used (see history.get_history).
+    """
+
+    __slots__ = (
+        'mode', 'task', 'screen', 'finished', 'result',
+        'resource_name', 'event_log', 'seed', 'settings', 'history', 
+        'answers', '_shown', '_answered', '_profile',
+    )
+
+    def __init__(self, mode_cls, resource_name, settings=None,
+                 event_log=True, seed=None, history=True):
+        if settings is None:
+            settings = mode_cls.get_default_settings()
+        if seed is None:
+            seed = int.from_bytes(os.urandom(8), 'little')
+        if event_log is True:
+            from .events import get_event_log
+            event_log = get_event_log()
+
+        self.mode = mode_cls
+        self.resource_name = resource_name
+        self.event_log = event_log
+        self.screen = Screen()
+        self.finished = False
+        self.result = None
+        self.seed = seed
+        self.settings = settings
+        self.history = history
+        self.answers = []
+        self._shown = None     # time of the last frame
+        self._answered = None  # time of the current answer
+        self._profile = metrics.profile_session()
+        self.task = mode_cls(
+            window=self.screen,
+            resource_name=resource_name,
+            settings=settings,
+            on_exit=self._on_exit,
+            on_event=self._on_event if event_log else None,
+            rng=random.Random(seed),
+            history=history
+        )
+
+    def start(self):
+        with self._measure('launch'):
+            self.task.launch()
+        self._shown = time.monotonic()
+        return self.frame()
+
+    def answer(self, answer_text):
+        if self.finished:
+            raise RuntimeError('Session is finished')
+        self._answered = time.monotonic()
+        self.answers.append(answer_text)
+        with self._measure('on_answer'):
+            self.task.on_answer(answer_text)
+        self._shown = time.monotonic()
+        return self.frame()
+
+    @property
+    def report(self):
+        return getattr(self.task, 'report', None)
+
+    def recording(self):
+        return {
+            'mode': self.mode.get_name(),
+            'resource': self.resource_name,
+            'seed': self.seed,
+            'settings': self.settings,
+            'history': self.history,
+            'answers': list(self.answers),
+            'result': self.result,
+        }
+
+    def frame(self):
+        state = {
+            'mode': self.mode.get_name(),
+            'finished': self.finished,
+        }
+        if not self.finished:
+            state.update(self.task.get_state())
+        return Frame(self.screen.display, state, self.finished)
+
+    def _on_event(self, key, answer_text, correct):
+        # latency: from the question on the screen to the answer
+        self.event_log.log(
+            mode=self.mode.get_name(),
+            resource=self.resource_name,
+            key=key,
+            answer=answer_text,
+            correct=correct,
+            latency=self._answered - self._shown,
+        )
+
+    @contextmanager
+    def _measure(self, name):
+        with metrics.span('{}.{}'.format(self.mode.__name__, name)):
+            if self._profile is None:
+                yield
+            else:
+                with self._profile.measure():
+                    yield
+
+    def _on_exit(self, result_text=''):
+        with metrics.span('{}.on_exit'.format(self.mode.__name__)):
+            self.finished = True
+            self.result = result_text
+            self.screen.display = result_text
+        replay.record(self)
+        if self.report is not None:
+            from .report import export
+            export(self)
+        if self._profile is not None:
+            # called inside the profiled launch or on_answer
+            self._profile.finish()
+            self._profile = None
@@ -0,0 +1,92 @@
+"""Union of the records of several resources
+
+Records of the parsed tables of the resources are merged without
+parsing them again: every record has a key, the normalized text of
+its first groups (questions and answers, the order of the strings of
+a group is ignored, see fuzzy.normalize), a record is in the union
+once, from the first resource containing its key.
+
+64-bit hashes of the keys are computed once for a resource and
+stored in its index sidecar (compiled.load_arrays), so the union of
+resources is built from integer arrays, without decoding records.
+"""
+import hashlib
+from array import array
+
+from .fuzzy import normalize
+
+
+KEYS_VERSION = 1  # version of record_key
+
+
+def record_key(record, groups=2):
+    """ returns the normalized key of the first groups of record """
+    return '\x1f'.join(
+        '\x1e'.join(sorted(map(normalize, group)))
+        for group in record[:groups]
+    )
+
+
+def key_hashes(file_path, table, groups=2):
+    """ returns array('Q') of hashes of the keys of the table records
+    of the resource file_path (stored in its sidecar)
+    """
+    from . import compiled
+
+    def build():
+        hashes = array('Q')
+        for record in table:
+            digest = hashlib.blake2b(
+                record_key(record, groups).encode('utf-8'), digest_size=8
+            ).digest()
+            hashes.append(int.from_bytes(digest, 'little'))
+        return {'keys': hashes}
+
+    kind = 'keys{}'.format(groups)
+    return compiled.load_arrays(
+        file_path, table, kind, build, KEYS_VERSION
+    )['keys']
+
+
+class RecordsUnion:
+    """Sequence of the distinct records of tables
+
+    - locate(i) -> (part, index) : table number and record index
+    - tables: tuple  : merged tables (compiled.Table)
+
+    hashes are the key hashes of the tables (see key_hashes).
+    """
+
+    def __init__(self, tables, hashes):
+        self.tables = tuple(tables)
+        self._parts = array('H')
+        self._indexes = array('I')
+        seen = set()
+        for part, keys in enumerate(hashes):
+            for index, key in enumerate(keys):
+                if key not in seen:
+                    seen.add(key)
+                    self._parts.append(part)
+                    self._indexes.append(index)
+
+    def __len__(self):
+        return len(self._indexes)
+
+    def __getitem__(self, i):
+        part, index = self.locate(i)
+        return self.tables[part][index]
+
+    def __iter__(self):
+        for part, index in zip(self._parts, self._indexes):
+            yield self.tables[part][index]
+
+    def __sizeof__(self):
+        # the tables are cached separately
+        return (
+            object.__sizeof__(self)
+            + self._parts.itemsize * len(self._parts)
+            + self._indexes.itemsize * len(self._indexes)
+        )
+
+    def locate(self, i):
+        return self._parts[i], self._indexes[i]
@@ -1,9 +1,11 @@
+import os
 import tkinter as tk
 import tkinter.ttk as ttk
-import tkinter.simpledialog as dialogs
 
 from functools import partial
 
+from . import metrics
+
 
 class View(ttk.Frame):
     """ GG app main window
@@ -14,6 +16,8 @@ class View(ttk.Frame):
     
     - launch() -> None
       : launch Tk mainloop
+
+    Only the changed end of the text is redrawn.
     
     """
 
@@ -25,20 +29,34 @@ class View(ttk.Frame):
         self.selected_resource = tk.StringVar()
         self.input_text = tk.StringVar()
 
+        self._text = ''      # text of display
+        self._rendered = ''  # text in the widget
+
         self._create_widgets()
 
     @property
     def display(self):
-        widget = self.widgets['display']
-        return widget.get(1.0, tk.END)
+        return self._text
 
     @display.setter
     def display(self, text):
-        widget = self.widgets['display']
-        widget.config(state=tk.NORMAL)
-        widget.delete(1.0, tk.END)
-        widget.insert(tk.END, text)
-        widget.config(state=tk.DISABLED)
+        self._text = text
+        self._redraw()
+
+    def _redraw(self):
+        old, new = self._rendered, self._text
+        if old == new:
+            return
+        with metrics.span('View.redraw'):
+            # keep the common beginning, replace the rest
+            common = len(os.path.commonprefix((old, new)))
+            widget = self.widgets['display']
+            widget.config(state=tk.NORMAL)
+            if common < len(old):
+                widget.delete('1.0 + {} chars'.format(common), tk.END)
+            widget.insert(tk.END, new[common:])
+            widget.config(state=tk.DISABLED)
+            self._rendered = new
 
     def _create_widgets(self):
         frame = self.master
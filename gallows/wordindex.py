@@ -0,0 +1,127 @@
+"""Candidate-filtering index over a list of words
+
+Words are filtered by a pattern of opened letters like '_А__Н' and
+a set of excluded letters without a loop over the words: every
+condition is a bitset of word ids (python int), filtering is a few
+AND / AND NOT operations over them.
+
+- by_length          : 'length': bitset of words
+- by_letter          : 'letter': bitset of words containing letter
+- by_position        : ('position', 'letter'): bitset of words
+
+LengthIndexes builds the WordIndex of the words of one length on the
+first filter of that length (a pattern has the length of its word),
+so a resource is not indexed until a hint is asked.
+"""
+import threading
+from collections import defaultdict
+
+
+def bit_count(bits):
+    """ returns the number of set bits (int.bit_count of python 3.10) """
+    return bin(bits).count('1')
+
+
+def bitset(ids, size):
+    """ returns int with bits ids set, size is the number of bits """
+    buffer = bytearray((size + 7) // 8)
+    for i in ids:
+        buffer[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+class WordIndex:
+    """Index of words (sequence of str)
+
+    - filter(pattern, excluded=()) -> int
+      : bitset of ids of the matching words
+    - letters_frequency(bits, letters) -> dict
+      : 'letter': number of words of bits containing it
+
+    pattern is a sequence of opened letters and None (hidden),
+    a hidden position can't be any of the opened letters.
+    """
+
+    def __init__(self, words):
+        length_ids = defaultdict(list)
+        letter_ids = defaultdict(list)
+        position_ids = defaultdict(list)
+
+        size = 0
+        for id_, word in enumerate(words):
+            for letter in set(word):
+                letter_ids[letter].append(id_)
+            for key in enumerate(word):
+                position_ids[key].append(id_)
+            length_ids[len(word)].append(id_)
+            size += 1
+
+        self.size = size
+        self.by_length = self._bitsets(length_ids)
+        self.by_letter = self._bitsets(letter_ids)
+        self.by_position = self._bitsets(position_ids)
+
+    def __len__(self):
+        return self.size
+
+    def __sizeof__(self):
+        size = object.__sizeof__(self)
+        for bitsets in (self.by_length, self.by_letter, self.by_position):
+            size += sum(map(int.__sizeof__, bitsets.values()))
+        return size
+
+    def filter(self, pattern, excluded=()):
+        bits = self.by_length.get(len(pattern), 0)
+        opened = {letter for letter in pattern if letter is not None}
+        for position, letter in enumerate(pattern):
+            if not bits:
+                break
+            if letter is not None:
+                bits &= self.by_position.get((position, letter), 0)
+            else:
+                # an opened letter is shown in all its positions
+                for letter in opened:
+                    bits &= ~self.by_position.get((position, letter), 0)
+        for letter in excluded:
+            bits &= ~self.by_letter.get(letter, 0)
+        return bits
+
+    def letters_frequency(self, bits, letters):
+        return {
+            letter: bit_count(bits & self.by_letter.get(letter, 0))
+            for letter in letters
+        }
+
+    def _bitsets(self, ids):
+        return {key: bitset(value, self.size) for key, value in ids.items()}
+
+
+class LengthIndexes:
+    """WordIndex of the words of every length, built on the first use
+
+    - filter(pattern, excluded=()) -> (WordIndex, int)
+      : the index of the words of the length of pattern and
+        the bitset of the matching words (see WordIndex.filter)
+
+    words_of(length) -> Iterable[str] returns the words of length.
+    Indexes are built once and shared by threads.
+    """
+
+    def __init__(self, words_of):
+        self._words_of = words_of
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sum(
+            map(WordIndex.__sizeof__, list(self._indexes.values()))
+        )
+
+    def filter(self, pattern, excluded=()):
+        length = len(pattern)
+        with self._lock:
+            index = self._indexes.get(length)
+            if index is None:
+                index = WordIndex(self._words_of(length))
+                self._indexes[length] = index
+        return index, index.filter(pattern, excluded)
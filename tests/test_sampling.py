@@ -0,0 +1,30 @@
+import random
+import unittest
+
+from gallows.sampling import WeightedSampler
+
+
+class WeightedSamplerTest(unittest.TestCase):
+
+    def test_sample_distinct_more_than_size(self):
+        rng = random.Random(0)
+        for size in (1, 4, 5, 9, 16, 100):
+            weights = [rng.choice((0.1, 1.0, 3.7, 1e-9)) for _ in range(size)]
+            sampler = WeightedSampler(weights)
+            for _ in range(20):
+                chosen = sampler.sample_distinct(size + 100, rng)
+                self.assertEqual(sorted(chosen), list(range(size)))
+            self.assertEqual(list(sampler.weights), weights)
+
+    def test_sample_distinct_skips_zero_weights(self):
+        sampler = WeightedSampler([0.0, 2.0, 0.0, 0.5])
+        chosen = sampler.sample_distinct(10, random.Random(1))
+        self.assertEqual(sorted(chosen), [1, 3])
+        sampler.update(1, 0.0)
+        sampler.update(3, 0.0)
+        self.assertEqual(sampler.sample_distinct(10), [])
+        self.assertRaises(ValueError, sampler.sample)
+
+
+if __name__ == '__main__':
+    unittest.main()